@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Parser backend micro-benchmark
+Times FirstCryScraper's full html.parser, restricted html.parser and lxml
+paths on saved pages
+
+With no pages given it runs on the synthetic pages committed under
+benchmarks/fixtures/ (a listing page, two product pages parsed from their
+markup and one that carries JSON-LD), so results are comparable between
+runs and machines:
+
+    python benchmarks/parser_benchmark.py
+
+Real pages can be saved and benchmarked too:
+
+    python benchmarks/parser_benchmark.py --save saved-pages \
+        https://www.firstcry.com/hot-wheels/0/0/113 <product-detail-url> ...
+    python benchmarks/parser_benchmark.py saved-pages/*.html
+"""
+
+import argparse
+import glob
+import os
+import re
+import statistics
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(HERE, "fixtures")
+
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+from hotwheels_monitor import FirstCryScraper  # noqa: E402
+
+
+def save_pages(directory, urls):
+    os.makedirs(directory, exist_ok=True)
+    scraper = FirstCryScraper()
+    for url in urls:
+        r = scraper.session.get(url, timeout=10)
+        if r.status_code != 200:
+            print(f"skip {url}: HTTP {r.status_code}")
+            continue
+        m = re.search(r"/(\d+)/product-detail", url)
+        if m:
+            name = f"product-{m.group(1)}.html"
+        else:
+            name = "listing-" + re.sub(r"\W+", "-", url.split("firstcry.com")[-1]).strip("-") + ".html"
+        path = os.path.join(directory, name)
+        with open(path, "wb") as f:
+            f.write(r.content)
+        print(f"saved {path} ({len(r.content)} bytes)")
+    scraper.close()
+
+
+def time_parse(parse, content, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        parse(content)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def benchmark(paths, rounds):
+    scrapers = {
+        "html.parser": FirstCryScraper(parser="html.parser", restrict_parse=False),
+        "restricted": FirstCryScraper(parser="html.parser"),
+        "lxml": FirstCryScraper(parser="lxml"),
+    }
+    if scrapers["lxml"].parser != "lxml":
+        sys.exit("lxml is not installed; nothing to compare")
+
+    print(f"{'page':40}" + "".join(f"{name:>14}" for name in scrapers) + f"{'speedup':>9}")
+    totals = dict.fromkeys(scrapers, 0.0)
+    for path in paths:
+        with open(path, "rb") as f:
+            content = f.read()
+        # Product pages are named product-<id>.html by --save; anything
+        # else is treated as a listing page.
+        m = re.search(r"product-(\d+)", os.path.basename(path))
+        url = f"{FirstCryScraper.BASE_URL}/hot-wheels/x/{m.group(1)}/product-detail" if m else None
+
+        medians = {}
+        for name, scraper in scrapers.items():
+            if url:
+                parse = lambda c, s=scraper: s._parse_product(url, c)
+            else:
+                parse = scraper._parse_listing
+            medians[name] = time_parse(parse, content, rounds)
+            totals[name] += medians[name]
+        report(os.path.basename(path)[:40], medians)
+
+    if len(paths) > 1:
+        report("total", totals)
+
+
+def report(label, timings):
+    """Print one row of timings; speedup is full html.parser vs lxml."""
+    print(f"{label:40}" + "".join(f"{t * 1000:12.2f}ms" for t in timings.values())
+          + f"{timings['html.parser'] / timings['lxml']:8.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare HTML parser backends on saved pages")
+    parser.add_argument("pages", nargs="*",
+                        help="saved HTML pages to benchmark (default: the pages in benchmarks/fixtures)")
+    parser.add_argument("--rounds", type=int, default=20,
+                        help="parses per page per backend; the median is reported (default: %(default)s)")
+    parser.add_argument("--save", metavar="DIR",
+                        help="fetch the given URLs into DIR instead of benchmarking")
+    args = parser.parse_args()
+
+    if args.save:
+        if not args.pages:
+            parser.error("no URLs given")
+        save_pages(args.save, args.pages)
+    else:
+        benchmark(args.pages or sorted(glob.glob(os.path.join(FIXTURES, "*.html"))), args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,17 +5,45 @@ State-aware discovery with Telegram notifications
 """
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, NavigableString
+from bs4.element import PreformattedString
+from bs4.filter import ElementFilter
 import time
 import re
-from datetime import datetime
-from typing import Dict, Set, List, Optional
-from enum import Enum
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Collection, Dict, Iterator, Set, List, Mapping, NamedTuple, Optional, Tuple
+from enum import Enum, IntEnum
 import sqlite3
+import hashlib
+import html
+import json
 from dataclasses import dataclass
 import logging
 import os
-import sys
+import threading
+import argparse
+import asyncio
+import queue
+import random
+import signal
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
+
+try:
+    import aiohttp
+except ImportError:  # only needed for --engine async
+    aiohttp = None
+
+try:
+    import brotli  # noqa: F401 - lets urllib3 and aiohttp decode "br" responses
+except ImportError:  # responses are negotiated as gzip/deflate only
+    brotli = None
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:  # html.parser is used instead
+    etree = lxml_html = None
 
 # -------------------- Logging --------------------
 
@@ -44,53 +72,285 @@ class Product:
     last_seen: str
     first_discovered: str
     brand_verified: bool
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+
+    def fingerprint(self) -> str:
+        """Digest of the fields that matter for change detection."""
+        key = f"{self.name}|{self.url}|{self.price}|{self.state.value}|{int(self.brand_verified)}"
+        return hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class BuyabilitySignals(NamedTuple):
+    """Everything a product page says about whether it can be bought."""
+    add_to_cart: bool
+    out_of_stock: bool
+    notify_me: bool
+    price_present: bool
+
+    @property
+    def is_buyable(self) -> bool:
+        return self.add_to_cart and not (self.out_of_stock or self.notify_me)
+
+    @property
+    def confidence(self) -> float:
+        """How clearly the signals agree on ``is_buyable`` (0-1)."""
+        blocked = self.out_of_stock or self.notify_me
+        if self.add_to_cart and blocked:
+            return 0.5     # contradictory page, resolved as not buyable
+        if self.add_to_cart:
+            return 1.0 if self.price_present else 0.8
+        if blocked:
+            return 1.0
+        return 0.4         # no signal at all; not buyable by absence
+
+
+class ListingTile(NamedTuple):
+    """What a listing page shows for one product, read without its detail page."""
+    product_id: str
+    url: str
+    name: Optional[str]
+    price: Optional[float]
+    stock: Optional[bool]     # True: add to cart, False: out of stock, None: no badge
+
+
+class KnownProduct(NamedTuple):
+    """Compact in-memory view of a stored product, used for per-scan lookups."""
+    state: ProductState
+    price: Optional[float]
+    first_discovered: str
+    fingerprint: Optional[str]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+    url: Optional[str] = None
+    last_checked: Optional[str] = None    # last time the detail page was validated
+
+
+class TransitionStats(NamedTuple):
+    """Summary of one product's recent rows in ``state_transitions``."""
+    recent: int             # transitions inside the scheduler's hot window
+    restocks: int           # of those, moves into BUYABLE from a known state
+
+
+class DetailPriority(IntEnum):
+    """Order in which detail pages are fetched when a scan is time-boxed."""
+    NEW = 0          # never seen before: a NEW alert waits on it
+    RESTOCK = 1      # known out of stock, listing tile now says buyable
+    CHANGED = 2      # any other badge or price change on the tile
+    SCHEDULED = 3    # revalidation picked by the scheduler
+
+
+class PendingDetail(NamedTuple):
+    """A detail fetch a time-boxed scan ran out of budget for."""
+    product_id: str
+    url: str
+    priority: DetailPriority
+
+
+class Notification(NamedTuple):
+    """One alert, as stored in the ``notifications`` outbox."""
+    key: str                  # one per transition: product, kind and transition time
+    product_id: str
+    kind: str                 # "NEW" or "RESTOCK"
+    name: Optional[str]
+    url: str
+    price: Optional[float]
+    created_at: str
+
+    @classmethod
+    def for_transition(cls, product: Product, kind: str, transition: "Transition") -> "Notification":
+        return cls(
+            key=f"{product.product_id}:{kind}:{transition.timestamp}",
+            product_id=product.product_id,
+            kind=kind,
+            name=product.name,
+            url=product.url,
+            price=product.price,
+            created_at=transition.timestamp
+        )
+
+
+@dataclass
+class Transition:
+    product_id: str
+    from_state: Optional[ProductState]
+    to_state: ProductState
+    timestamp: str
+    notified: bool = False
 
 
 # -------------------- Database --------------------
 
 class ProductDatabase:
+    """SQLite store owning one long-lived connection for the process lifetime.
+
+    The connection runs in WAL mode with relaxed fsync, so per-product
+    reads and writes no longer pay an open/close and a full disk sync.
+    Use as a context manager (or call ``close()``) so the WAL is
+    checkpointed back into the main database file on exit.
+    """
+
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-8000",
+        "PRAGMA busy_timeout=5000",
+    )
+
+    # Columns added after the original schema; created on startup if missing.
+    EXTRA_COLUMNS = {
+        "products": {
+            "fingerprint": "TEXT",
+            "etag": "TEXT",
+            "last_modified": "TEXT",
+            "content_hash": "TEXT",
+            "last_checked": "TEXT",
+        },
+    }
+
+    UPSERT_PRODUCT_SQL = """
+        INSERT INTO products
+        (product_id, name, url, price, state, last_seen, first_discovered, brand_verified,
+         fingerprint, etag, last_modified, content_hash, last_checked)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(product_id) DO UPDATE SET
+            name = excluded.name,
+            url = excluded.url,
+            price = excluded.price,
+            state = excluded.state,
+            last_seen = excluded.last_seen,
+            first_discovered = excluded.first_discovered,
+            brand_verified = excluded.brand_verified,
+            fingerprint = excluded.fingerprint,
+            etag = excluded.etag,
+            last_modified = excluded.last_modified,
+            content_hash = excluded.content_hash,
+            last_checked = excluded.last_checked
+    """
+
+    # Bump last_seen for an unchanged product, refreshing its HTTP validators,
+    # body hash and last_checked when the detail page was actually fetched.
+    TOUCH_PRODUCT_SQL = """
+        UPDATE products SET
+            last_seen = ?,
+            etag = COALESCE(?, etag),
+            last_modified = COALESCE(?, last_modified),
+            content_hash = COALESCE(?, content_hash),
+            last_checked = COALESCE(?, last_checked)
+        WHERE product_id = ?
+    """
+
+    INSERT_TRANSITION_SQL = """
+        INSERT INTO state_transitions
+        (product_id, from_state, to_state, timestamp, notified)
+        VALUES (?, ?, ?, ?, ?)
+    """
+
     def __init__(self, db_path: str = "hotwheels_products.db"):
         self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        for pragma in self.PRAGMAS:
+            self._conn.execute(pragma)
         self._init_db()
 
-    def _init_db(self):
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
-
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS products (
-                product_id TEXT PRIMARY KEY,
-                name TEXT,
-                url TEXT,
-                price REAL,
-                state TEXT,
-                last_seen TEXT,
-                first_discovered TEXT,
-                brand_verified INTEGER
-            )
-        """)
-
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS state_transitions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                product_id TEXT,
-                from_state TEXT,
-                to_state TEXT,
-                timestamp TEXT,
-                notified INTEGER
-            )
-        """)
+    def __enter__(self):
+        return self
 
-        conn.commit()
-        conn.close()
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
-    def get_product(self, product_id: str) -> Optional[Product]:
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
+    def close(self):
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.Error as e:
+                logger.warning(f"WAL checkpoint failed: {e}")
+            self._conn.close()
+            self._conn = None
 
-        cur.execute("SELECT * FROM products WHERE product_id = ?", (product_id,))
-        row = cur.fetchone()
-        conn.close()
+    def _init_db(self):
+        with self._lock:
+            cur = self._conn.cursor()
+
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS products (
+                    product_id TEXT PRIMARY KEY,
+                    name TEXT,
+                    url TEXT,
+                    price REAL,
+                    state TEXT,
+                    last_seen TEXT,
+                    first_discovered TEXT,
+                    brand_verified INTEGER
+                )
+            """)
+
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS state_transitions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    product_id TEXT,
+                    from_state TEXT,
+                    to_state TEXT,
+                    timestamp TEXT,
+                    notified INTEGER
+                )
+            """)
+
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS scan_queue (
+                    product_id TEXT PRIMARY KEY,
+                    url TEXT,
+                    priority INTEGER,
+                    position INTEGER
+                )
+            """)
+
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS notifications (
+                    key TEXT PRIMARY KEY,
+                    product_id TEXT,
+                    kind TEXT,
+                    name TEXT,
+                    url TEXT,
+                    price REAL,
+                    created_at TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    delivered_at TEXT
+                )
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS notifications_undelivered
+                ON notifications (created_at) WHERE delivered_at IS NULL
+            """)
+
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS scan_state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+
+            for table, columns in self.EXTRA_COLUMNS.items():
+                present = {row[1] for row in cur.execute(f"PRAGMA table_info({table})")}
+                for column, decl in columns.items():
+                    if column not in present:
+                        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+            self._conn.commit()
+
+    def get_product(self, product_id: str) -> Optional[Product]:
+        with self._lock:
+            cur = self._conn.execute("""
+                SELECT product_id, name, url, price, state, last_seen, first_discovered, brand_verified
+                FROM products WHERE product_id = ?
+            """, (product_id,))
+            row = cur.fetchone()
 
         if not row:
             return None
@@ -106,15 +366,149 @@ class ProductDatabase:
             brand_verified=bool(row[7])
         )
 
+    def load_index(self) -> Dict[str, "KnownProduct"]:
+        """Read every known product in one query, keyed by product ID."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT product_id, {', '.join(KnownProduct._fields)} FROM products"
+            ).fetchall()
+
+        index = {}
+        for product_id, state, *rest in rows:
+            index[product_id] = KnownProduct(ProductState(state), *rest)
+        return index
+
+    def load_transition_stats(self, since: str) -> Dict[str, TransitionStats]:
+        """Aggregate each product's recent transitions in one query.
+
+        ``since`` (an ISO timestamp) bounds what counts as recent; products
+        with no transition since then are left out.
+        """
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT product_id,
+                       COUNT(*),
+                       SUM(to_state = 'BUYABLE' AND from_state IS NOT NULL)
+                FROM state_transitions
+                WHERE timestamp >= ?
+                GROUP BY product_id
+            """, (since,)).fetchall()
+
+        return {row[0]: TransitionStats(*row[1:]) for row in rows}
+
+    def load_scan_queue(self) -> List[PendingDetail]:
+        """Detail fetches left over by the previous scan, highest priority first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT product_id, url, priority FROM scan_queue ORDER BY priority, position"
+            ).fetchall()
+        return [PendingDetail(pid, url, DetailPriority(priority)) for pid, url, priority in rows]
+
+    def load_scan_state(self) -> Dict[str, str]:
+        """Bookkeeping of the last scan (``scan_started``, ``checkpoint_at``, ``scan_finished``)."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT key, value FROM scan_state").fetchall())
+
     def save_product(self, product: Product):
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
-
-        cur.execute("""
-            INSERT OR REPLACE INTO products
-            (product_id, name, url, price, state, last_seen, first_discovered, brand_verified)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+        with self._lock, self._conn:
+            self._conn.execute(self.UPSERT_PRODUCT_SQL, self._product_row(product))
+
+    def log_transition(self, product_id, from_state, to_state, notified):
+        transition = Transition(
+            product_id=product_id,
+            from_state=from_state,
+            to_state=to_state,
+            timestamp=datetime.now().isoformat(),
+            notified=notified
+        )
+        with self._lock, self._conn:
+            self._conn.execute(self.INSERT_TRANSITION_SQL, self._transition_row(transition))
+
+    def load_outbox(self, since: str) -> List[Notification]:
+        """Undelivered alerts raised at or after ``since`` (an ISO timestamp), oldest first."""
+        with self._lock:
+            rows = self._conn.execute(f"""
+                SELECT {', '.join(Notification._fields)} FROM notifications
+                WHERE delivered_at IS NULL AND created_at >= ?
+                ORDER BY created_at
+            """, (since,)).fetchall()
+        return [Notification(*row) for row in rows]
+
+    def mark_delivered(self, notification: Notification) -> bool:
+        """Close an outbox entry and flag the transition that raised it.
+
+        Returns False, leaving the entry pending, if the database has
+        already been closed (a delivery that outlived ``close``).
+        """
+        with self._lock:
+            if self._conn is None:
+                return False
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE notifications SET delivered_at = ?, attempts = attempts + 1 WHERE key = ?",
+                    (datetime.now().isoformat(), notification.key)
+                )
+                self._conn.execute(
+                    "UPDATE state_transitions SET notified = 1 WHERE product_id = ? AND timestamp = ?",
+                    (notification.product_id, notification.created_at)
+                )
+        return True
+
+    def mark_failed(self, notification: Notification) -> Optional[int]:
+        """Count a failed delivery round; returns the entry's failures so far,
+        or None if the database has already been closed."""
+        with self._lock:
+            if self._conn is None:
+                return None
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE notifications SET attempts = attempts + 1 WHERE key = ?",
+                    (notification.key,)
+                )
+                row = self._conn.execute(
+                    "SELECT attempts FROM notifications WHERE key = ?", (notification.key,)
+                ).fetchone()
+        return row[0] if row else 0
+
+    def commit_batch(self, batch: "ScanBatch"):
+        """Write every upsert and transition of a scan in one transaction."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                self.UPSERT_PRODUCT_SQL,
+                [self._product_row(p) for p in batch.products.values()]
+            )
+            self._conn.executemany(
+                self.TOUCH_PRODUCT_SQL,
+                [(*sighting, product_id) for product_id, sighting in batch.touched.items()]
+            )
+            self._conn.executemany(
+                self.INSERT_TRANSITION_SQL,
+                [self._transition_row(t) for t in batch.transitions]
+            )
+            if batch.pending is not None:
+                self._conn.execute("DELETE FROM scan_queue")
+                self._conn.executemany(
+                    "INSERT INTO scan_queue (product_id, url, priority, position) VALUES (?, ?, ?, ?)",
+                    [(item.product_id, item.url, int(item.priority), n)
+                     for n, item in enumerate(batch.pending)]
+                )
+            # The key embeds the transition time, so it only names this alert
+            # for delivery tracking. A resumed scan does not re-raise it
+            # because the outbox row commits with the product state that
+            # raised it.
+            self._conn.executemany(
+                f"INSERT OR IGNORE INTO notifications ({', '.join(Notification._fields)}) "
+                f"VALUES ({', '.join('?' * len(Notification._fields))})",
+                batch.notifications
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO scan_state (key, value) VALUES (?, ?)",
+                batch.state.items()
+            )
+
+    @staticmethod
+    def _product_row(product: Product):
+        return (
             product.product_id,
             product.name,
             product.url,
@@ -122,34 +516,294 @@ class ProductDatabase:
             product.state.value,
             product.last_seen,
             product.first_discovered,
-            int(product.brand_verified)
-        ))
+            int(product.brand_verified),
+            product.fingerprint(),
+            product.etag,
+            product.last_modified,
+            product.content_hash,
+            product.last_seen
+        )
 
-        conn.commit()
-        conn.close()
+    @staticmethod
+    def _transition_row(transition: Transition):
+        return (
+            transition.product_id,
+            transition.from_state.value if transition.from_state else None,
+            transition.to_state.value,
+            transition.timestamp,
+            int(transition.notified)
+        )
 
-    def log_transition(self, product_id, from_state, to_state, notified):
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
 
-        cur.execute("""
-            INSERT INTO state_transitions
-            (product_id, from_state, to_state, timestamp, notified)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            product_id,
-            from_state.value if from_state else None,
-            to_state.value,
-            datetime.now().isoformat(),
-            int(notified)
-        ))
+class ScanBatch:
+    """Product upserts and state transitions accumulated during one scan.
+
+    Nothing touches the database until ``ProductDatabase.commit_batch``,
+    so a scan that crashes part-way leaves the previous state intact.
+    Alerts go to the ``notifications`` outbox in the same transaction as
+    the transitions that raised them. ``pending``, when set, replaces the
+    stored queue of detail fetches carried over to the next scan, and
+    ``state`` is merged into the ``scan_state`` table. A long scan may commit several batches, calling
+    ``clear`` after each checkpoint.
+    """
 
-        conn.commit()
-        conn.close()
+    def __init__(self):
+        self.products: Dict[str, Product] = {}
+        self.touched: Dict[str, tuple] = {}
+        self.transitions: List[Transition] = []
+        self.notifications: List[Notification] = []
+        self.pending: Optional[List[PendingDetail]] = None
+        self.state: Dict[str, str] = {}
+
+    def clear(self):
+        self.products.clear()
+        self.touched.clear()
+        self.transitions.clear()
+        self.notifications.clear()
+        self.pending = None
+        self.state = {}
+
+    def add_product(self, product: Product):
+        self.touched.pop(product.product_id, None)
+        self.products[product.product_id] = product
+
+    def touch(self, product_id: str, last_seen: str, etag: Optional[str] = None,
+              last_modified: Optional[str] = None, content_hash: Optional[str] = None,
+              checked: bool = False):
+        """Record a sighting of an unchanged product (last_seen and validators only).
+
+        ``checked`` marks that the detail page was fetched, not just the
+        listing tile seen.
+        """
+        product = self.products.get(product_id)
+        if product is None:
+            previous = self.touched.get(product_id)
+            last_checked = last_seen if checked else (previous[4] if previous else None)
+            self.touched[product_id] = (last_seen, etag, last_modified, content_hash, last_checked)
+        else:
+            product.last_seen = last_seen
+
+    def add_transition(self, transition: Transition):
+        self.transitions.append(transition)
+
+    def add_notification(self, notification: Notification):
+        self.notifications.append(notification)
 
 
 # -------------------- Scraper --------------------
 
+class RateLimiter:
+    """Token bucket shared by every request to FirstCry, backing off on throttling.
+
+    Tokens accrue at ``rate`` per second up to ``burst``; each request
+    takes one and waits for it when the bucket is empty, so the site sees
+    the same request rate however many workers are running. A throttling
+    signal (HTTP 429/503 or a timeout) halves the rate, down to
+    ``min_rate``, and pauses all requests for any ``Retry-After``; every
+    successful response then adds a twentieth of the configured rate back
+    (AIMD). A ``rate`` of 0 or less means no limit apart from those pauses.
+    """
+
+    DECREASE = 0.5
+    INCREASE_STEPS = 20
+
+    def __init__(self, rate: float, burst: float = 1.0, min_rate: Optional[float] = None):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(rate, min_rate if min_rate is not None else rate / 16)
+        self.burst = max(1.0, burst)
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = time.monotonic()     # tokens are accounted up to here
+        self._paused_until = 0.0
+
+    def reserve(self) -> float:
+        """Claim the next token and return how long to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            pause = max(0.0, self._paused_until - now)
+            if self.rate <= 0:
+                return pause
+            # _updated is pushed past ``now`` by a Retry-After pause, during
+            # which no tokens accrue.
+            if now > self._updated:
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+            self._tokens -= 1
+            return pause + max(0.0, -self._tokens) / self.rate
+
+    def paused_for(self) -> float:
+        """Seconds left of a Retry-After pause that began after ``reserve``."""
+        with self._lock:
+            return max(0.0, self._paused_until - time.monotonic())
+
+    def acquire(self, budget: Optional["ScanBudget"] = None):
+        """Wait for a token. With a ``budget``, a wait that would outlast the
+        scan's deadline exhausts the budget and raises ScanBudgetExhausted."""
+        wait = self.reserve()
+        while wait > 0:
+            self._check_budget(wait, budget)
+            time.sleep(wait)
+            wait = self.paused_for()
+
+    async def acquire_async(self, budget: Optional["ScanBudget"] = None):
+        wait = self.reserve()
+        while wait > 0:
+            self._check_budget(wait, budget)
+            await asyncio.sleep(wait)
+            wait = self.paused_for()
+
+    @staticmethod
+    def _check_budget(wait: float, budget: Optional["ScanBudget"]):
+        if budget is not None and not budget.fits(wait):
+            budget.exhaust()
+            raise ScanBudgetExhausted(f"a {wait:.0f}s wait outlasts the scan deadline")
+
+    def throttled(self, retry_after: Optional[float] = None):
+        """Multiplicative decrease after a 429/503 or a timeout."""
+        with self._lock:
+            if retry_after:
+                now = time.monotonic()
+                if self.rate > 0 and now > self._updated:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                # No burst straight after the pause.
+                self._tokens = min(self._tokens, 0.0)
+                resume = now + retry_after
+                self._paused_until = max(self._paused_until, resume)
+                self._updated = max(self._updated, resume)
+            if self.rate > 0:
+                self.rate = max(self.min_rate, self.rate * self.DECREASE)
+
+    def succeeded(self):
+        """Additive increase after a response that was not throttled."""
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / self.INCREASE_STEPS)
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Seconds to wait from a ``Retry-After`` header (delta or HTTP date)."""
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryPolicy(NamedTuple):
+    """How FirstCryScraper retries and hedges requests.
+
+    Failed attempts are retried after a random delay of up to
+    ``backoff * 2 ** attempt`` seconds (capped at ``max_backoff``). A
+    product page slower than the ``hedge_percentile`` of recent response
+    times (but at least ``hedge_min`` seconds) gets a duplicate request
+    raced against it; ``hedge_percentile=None`` turns hedging off.
+    """
+    attempts: int = 3
+    backoff: float = 0.5
+    max_backoff: float = 8.0
+    hedge_percentile: Optional[float] = 95.0
+    hedge_min: float = 1.0
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+class LatencyTracker:
+    """Rolling window of recent response times."""
+
+    MIN_SAMPLES = 20    # no percentile until this many responses are in
+
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < self.MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+class ScanBudget:
+    """Wall-clock and request limits shared by everything one scan fetches.
+
+    ``deadline`` is in seconds from creation; either limit may be ``None``
+    for no limit. Once ``spend`` has refused a request it keeps refusing.
+    """
+
+    def __init__(self, deadline: Optional[float] = None, max_requests: Optional[int] = None):
+        self._stop_at = time.monotonic() + deadline if deadline is not None else None
+        self._left = max_requests
+        self._lock = threading.Lock()
+
+    def exhaust(self):
+        """Refuse every further request (used to wind a scan down early)."""
+        with self._lock:
+            self._left = 0
+
+    def exhausted(self) -> bool:
+        with self._lock:
+            return self._left == 0
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the deadline, or None without one."""
+        if self._stop_at is None:
+            return None
+        return max(0.0, self._stop_at - time.monotonic())
+
+    def fits(self, wait: float) -> bool:
+        """Whether a request delayed by ``wait`` seconds still starts in time."""
+        remaining = self.remaining()
+        return remaining is None or wait < remaining
+
+    def spend(self) -> bool:
+        """Claim one request, or return False if the scan is out of budget."""
+        with self._lock:
+            if self._stop_at is not None and time.monotonic() >= self._stop_at:
+                self._left = 0
+            if self._left is None:
+                return True
+            if self._left <= 0:
+                return False
+            self._left -= 1
+            return True
+
+
+class ScanBudgetExhausted(Exception):
+    """A request was given up because it could not start before the scan's deadline."""
+
+
+class ProductPageFilter(ElementFilter):
+    """Restricts BeautifulSoup to the parts of a product page we read.
+
+    Only ``h1``/``span``/``button`` subtrees (name, price, add-to-cart)
+    and loose text mentioning a stock message are built; the rest of the
+    page is tokenized but never turned into tree nodes.
+    """
+
+    TAGS = frozenset({"h1", "span", "button"})
+    STOCK_TEXT = re.compile("out of stock|notify me", re.I)
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return name in self.TAGS
+
+    def allow_string_creation(self, string):
+        return self.STOCK_TEXT.search(string) is not None
+
+
 class FirstCryScraper:
     BASE_URL = "https://www.firstcry.com"
 
@@ -159,123 +813,1343 @@ class FirstCryScraper:
         "category": "/hot-wheels/toy-cars,-trains-and-vehicles/5/94/113"
     }
 
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0"
-        })
+    HEADERS = {
+        "User-Agent": (
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+            "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+        ),
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "en-IN,en;q=0.9",
+        "Accept-Encoding": "gzip, deflate, br" if brotli else "gzip, deflate",
+    }
 
-    def discover_products(self) -> Set[str]:
-        urls = set()
+    PRODUCT_LINK = re.compile(r"/hot-wheels/.*/\d+/product-detail")
+
+    PAGE_PARAM = "page"
+
+    TIMEOUT = 10    # seconds per request
+
+    # Responses that mean "slow down"; the rate limiter backs off on them.
+    THROTTLE_STATUS = frozenset({429, 503})
+    # Responses worth another attempt.
+    RETRY_STATUS = THROTTLE_STATUS | {500, 502, 504}
+
+    # How far above a product link to look for the boundary of its tile.
+    TILE_MAX_DEPTH = 6
+    TILE_PRICE = re.compile(r"₹\s*([\d,]+(?:\.\d+)?)")
+
+    PARSERS = ("lxml", "html.parser")
+
+    # XPath twins of the BeautifulSoup lookups, tried in the same order.
+    # The class tests match one token of a multi-valued attribute, like
+    # bs4's ``class_=`` does.
+    XPATH_NAME = tuple(etree.XPath(x) for x in (
+        "//h1[contains(concat(' ', normalize-space(@class), ' '), ' prod-name ')]",
+        "//span[@itemprop='name']",
+    )) if etree else ()
+    XPATH_TEXT = etree.XPath("//text()") if etree else None
+    # Visible text under a listing tile; bs4's get_text skips scripts and styles too.
+    XPATH_TILE_TEXT = etree.XPath(".//text()[not(parent::script or parent::style)]") if etree else None
+
+    # schema.org ItemAvailability values, compared without the URL prefix.
+    # Anything else (PreOrder, BackOrder, ...) defers to the DOM scrapers.
+    JSON_LD_IN_STOCK = frozenset({"InStock", "LimitedAvailability", "OnlineOnly"})
+    JSON_LD_OUT_OF_STOCK = frozenset({"OutOfStock", "SoldOut", "Discontinued"})
+
+    # Phrases matched (case-insensitively) by the buyability classifiers.
+    OUT_OF_STOCK_TEXT = "out of stock"
+    NOTIFY_ME_TEXT = "notify me"
+    ADD_TO_CART_TEXT = "add to cart"
+
+    # Inline scripts carry per-request tokens and timestamps, so they are
+    # left out of the body hash used to detect unchanged product pages.
+    # JSON-LD blocks are kept (wherever they are): they carry the
+    # availability the parser reads first.
+    VOLATILE_MARKUP = re.compile(rb"<script\b(?![^>]*application/ld\+json).*?</script\s*>", re.I | re.S)
+    JSON_LD_MARKUP = re.compile(rb"<script\b[^>]*application/ld\+json.*?</script\s*>", re.I | re.S)
+
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None, workers: int = 4,
+                 max_pages: int = 1, parser: Optional[str] = None, restrict_parse: bool = True,
+                 retry: Optional[RetryPolicy] = None):
+        self.rate_limiter = rate_limiter or RateLimiter(MonitorConfig.rate)
+        self.workers = max(1, workers)
+        self.max_pages = max(1, max_pages)
+        self.parser = self._pick_parser(parser)
+        self.restrict_parse = restrict_parse
+        self.retry = retry or RetryPolicy()
+        self.latency = LatencyTracker()
+        self.session = self._open_session()
+        self._fetch_pool = self._open_fetch_pool()
+
+    def _open_session(self) -> requests.Session:
+        """Session whose keep-alive pool fits every request that can be in
+        flight at once: a request and its hedge per validation worker,
+        plus one listing page per discovery surface. Retrying is left to
+        ``_fetch``, so the adapter itself never retries."""
+        session = requests.Session()
+        session.headers.update(self.HEADERS)
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=2 * self.workers + len(self.DISCOVERY_SURFACES),
+            max_retries=0
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _open_fetch_pool(self) -> Optional[ThreadPoolExecutor]:
+        """Threads that product requests run on, so a slow one can be hedged:
+        each validation worker may have a request and its duplicate in flight."""
+        return ThreadPoolExecutor(max_workers=2 * self.workers, thread_name_prefix="fetch")
+
+    def _close_session(self):
+        self.session.close()
+
+    def connection_stats(self) -> Tuple[int, int]:
+        """Requests sent and TCP connections opened so far; the gap is keep-alive reuse."""
+        sent = opened = 0
+        for adapter in {id(a): a for a in self.session.adapters.values()}.values():
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                sent += pool.num_requests
+                opened += pool.num_connections
+        return sent, opened
+
+    def close(self):
+        if self._fetch_pool is not None:
+            self._fetch_pool.shutdown(wait=False, cancel_futures=True)
+        self._close_session()
+
+    @staticmethod
+    def _pick_parser(parser: Optional[str]) -> str:
+        if parser not in (None, "lxml", "html.parser"):
+            raise ValueError(f"Unknown parser backend: {parser}")
+        if parser == "html.parser":
+            return parser
+        if lxml_html is None:
+            if parser == "lxml":
+                logger.warning("lxml is not installed, using html.parser")
+            return "html.parser"
+        return "lxml"
+
+    def _get(self, url: str, headers: Optional[Dict[str, str]] = None,
+             budget: Optional[ScanBudget] = None):
+        self.rate_limiter.acquire(budget)
+        return self._send(url, headers)
+
+    def _send(self, url: str, headers: Optional[Dict[str, str]] = None):
+        started = time.monotonic()
+        try:
+            r = self.session.get(url, timeout=self.TIMEOUT, headers=headers)
+        except requests.Timeout:
+            self.rate_limiter.throttled()
+            raise
+        self.latency.record(time.monotonic() - started)
+        self._note_response(url, r.status_code, r.headers)
+        return r
+
+    def _fetch(self, url: str, headers: Optional[Dict[str, str]] = None,
+               budget: Optional[ScanBudget] = None, hedge: bool = False):
+        """GET ``url`` under the retry policy, hedging slow attempts if asked.
+
+        Connection errors, timeouts and ``RETRY_STATUS`` responses are
+        retried with backoff. The last response is returned, or the last
+        error raised, once the policy or ``budget`` gives up.
+        """
+        attempt = 0
+        while True:
+            try:
+                r = self._hedged_get(url, headers, budget) if hedge else self._get(url, headers, budget)
+                outcome = r.status_code
+            except requests.RequestException as e:
+                r, outcome = None, e
+            delay = self._retry_delay(url, attempt, outcome, budget)
+            if delay is None:
+                if r is None:
+                    raise outcome
+                return r
+            time.sleep(delay)
+            attempt += 1
+
+    def _hedged_get(self, url: str, headers: Optional[Dict[str, str]], budget: Optional[ScanBudget]):
+        """One attempt at ``url``, raced against a duplicate if it is slow."""
+        self.rate_limiter.acquire(budget)
+        primary = self._fetch_pool.submit(self._send, url, headers)
+        delay = self._hedge_delay()
+        if delay is None or wait([primary], timeout=delay).done:
+            return primary.result()
+        if budget is not None and not budget.spend():
+            return primary.result()
+        try:
+            self.rate_limiter.acquire(budget)
+        except ScanBudgetExhausted:
+            return primary.result()
+        if primary.done():
+            return primary.result()
+        logger.info(f"Hedging slow request after {delay:.1f}s: {url}")
+        backup = self._fetch_pool.submit(self._send, url, headers)
+        error = None
+        for future in as_completed([primary, backup]):
+            try:
+                return future.result()
+            except requests.RequestException as e:
+                error = error or e
+        raise error
+
+    def _hedge_delay(self) -> Optional[float]:
+        """How long a product request may run before it is hedged, if at all."""
+        if not self.retry.hedge_percentile:
+            return None
+        threshold = self.latency.percentile(self.retry.hedge_percentile)
+        return None if threshold is None else max(self.retry.hedge_min, threshold)
+
+    def _retry_delay(self, url: str, attempt: int, outcome, budget: Optional[ScanBudget]) -> Optional[float]:
+        """Backoff before retrying ``url`` after ``outcome`` (an HTTP status or
+        an error), or None if it is not retried. A retry is a request like
+        any other, so it is refused once ``budget`` is spent."""
+        if isinstance(outcome, int) and outcome not in self.RETRY_STATUS:
+            return None
+        if attempt + 1 >= self.retry.attempts:
+            return None
+        delay = self.retry.delay(attempt)
+        if budget is not None and not (budget.fits(delay) and budget.spend()):
+            return None
+        reason = f"HTTP {outcome}" if isinstance(outcome, int) else repr(outcome)
+        logger.info(f"Retrying in {delay:.1f}s ({reason}): {url}")
+        return delay
+
+    def _note_response(self, url: str, status: int, headers: Mapping[str, str]):
+        """Feed a response's status back into the rate limiter."""
+        if status not in self.THROTTLE_STATUS:
+            self.rate_limiter.succeeded()
+            return
+        retry_after = RateLimiter.parse_retry_after(headers.get("Retry-After"))
+        self.rate_limiter.throttled(retry_after)
+        logger.warning(
+            f"Throttled by FirstCry (HTTP {status}) on {url}; rate now "
+            f"{self.rate_limiter.rate:.2f} req/s"
+            + (f", pausing {retry_after:.0f}s" if retry_after else "")
+        )
 
-        for name, path in self.DISCOVERY_SURFACES.items():
-            logger.info(f"Scanning {name}")
+    def discover_products(self, known_ids: Collection[str] = ()) -> Set[str]:
+        return {tile.url for tile in self.iter_discovered(known_ids)}
+
+    def iter_discovered(self, known_ids: Collection[str] = (),
+                        budget: Optional[ScanBudget] = None) -> Iterator[ListingTile]:
+        """Crawl all discovery surfaces concurrently, yielding each new
+        product's listing tile as soon as its page has been parsed."""
+        pages = queue.Queue()
+
+        def crawl(name, path):
             try:
-                r = self.session.get(self.BASE_URL + path, timeout=10)
-                if r.status_code != 200:
+                for links in self._crawl_surface(name, path, known_ids, budget):
+                    pages.put(links)
+            finally:
+                pages.put(None)
+
+        with ThreadPoolExecutor(max_workers=len(self.DISCOVERY_SURFACES)) as pool:
+            for name, path in self.DISCOVERY_SURFACES.items():
+                pool.submit(crawl, name, path)
+            yield from self._unique_links(pages)
+
+    def _crawl_surface(self, name: str, path: str, known_ids: Collection[str],
+                       budget: Optional[ScanBudget] = None) -> Iterator[Dict[str, ListingTile]]:
+        """Yield the product links of successive listing pages of one surface.
+
+        Crawling stops at ``max_pages``, on an empty or repeated page, or
+        as soon as a page holds nothing but already-known product IDs:
+        listings put new arrivals first, so deeper pages of a page that
+        is all old stock are only re-crawled when something new appears.
+        It also stops when ``budget`` runs out.
+        """
+        seen = set()
+        for url in self._surface_pages(name, path, budget):
+            links = self._fetch_listing(url, budget)
+            last = self._is_last_page(links, seen, known_ids)
+            if links:
+                yield links
+            if last:
+                return
+            seen.update(links)
+
+    def _surface_pages(self, name: str, path: str, budget: Optional[ScanBudget]) -> Iterator[str]:
+        """URLs of one surface's listing pages, in order, while ``budget`` lasts."""
+        for page in range(1, self.max_pages + 1):
+            if budget and not budget.spend():
+                logger.info(f"Scan budget spent, not crawling {name} past page {page - 1}")
+                return
+            logger.info(f"Scanning {name} (page {page})")
+            yield self._page_url(path, page)
+
+    def _fetch_listing(self, url: str, budget: Optional[ScanBudget] = None) -> Dict[str, ListingTile]:
+        try:
+            r = self._fetch(url, budget=budget)
+            if r.status_code != 200:
+                return {}
+            return self._parse_listing(r.content)
+        except ScanBudgetExhausted as e:
+            logger.info(f"Not crawling {url}: {e}")
+            return {}
+        except Exception as e:
+            logger.error(f"Discovery error: {e}")
+            return {}
+
+    def _page_url(self, path: str, page: int) -> str:
+        if page == 1:
+            return self.BASE_URL + path
+        sep = "&" if "?" in path else "?"
+        return f"{self.BASE_URL}{path}{sep}{self.PAGE_PARAM}={page}"
+
+    def _is_last_page(self, links: Dict[str, ListingTile], seen: Set[str],
+                      known_ids: Collection[str]) -> bool:
+        new = links.keys() - seen
+        if not new:
+            return True
+        return all(links[url].product_id in known_ids for url in new)
+
+    def _unique_links(self, pages: "queue.Queue") -> Iterator[ListingTile]:
+        """De-duplicate links by product ID as listing pages arrive.
+
+        The same product is often linked from several surfaces under
+        different slugs; only the first URL seen for an ID is yielded.
+        Each surface crawler puts ``None`` on ``pages`` when it finishes.
+        """
+        seen = set()
+        remaining = len(self.DISCOVERY_SURFACES)
+        while remaining:
+            links = pages.get()
+            if links is None:
+                remaining -= 1
+                continue
+            for url in sorted(links):
+                tile = links[url]
+                if tile.product_id in seen:
                     continue
+                seen.add(tile.product_id)
+                yield tile
+        logger.info(f"Discovered {len(seen)} candidates")
+
+    def validate_product(self, url: str, cached: Optional[KnownProduct] = None,
+                         budget: Optional[ScanBudget] = None) -> Optional[Dict]:
+        """Fetch and parse a product page.
+
+        With a ``cached`` entry carrying an ETag or Last-Modified value the
+        request is conditional. When the server answers 304, or the page
+        body hashes to the ``content_hash`` stored for it, nothing is parsed
+        and ``{"unchanged": "304" | "hash", ...}`` is returned instead.
+        Failed attempts are retried and slow ones hedged (see ``RetryPolicy``);
+        ``budget`` caps those extra requests.
+        """
+        try:
+            r = self._fetch(url, self._conditional_headers(cached), budget, hedge=True)
+            return self._handle_product_response(url, r.status_code, r.content, r.headers, cached)
+        except ScanBudgetExhausted as e:
+            logger.info(f"Not fetching {url}: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Validation error: {e}")
+            return None
+
+    def validate_many(self, urls, cache: Mapping[str, KnownProduct] = None,
+                      budget: Optional[ScanBudget] = None) -> Iterator[Optional[Dict]]:
+        """Validate URLs on a bounded worker pool, yielding results as they finish.
+
+        ``cache`` maps product IDs to their stored entries and supplies the
+        validators for conditional requests.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            yield from self._stream_results(
+                urls, lambda url: pool.submit(self.validate_product, url, self._cached(url, cache), budget)
+            )
+
+    def _cached(self, url: str, cache: Optional[Mapping[str, KnownProduct]]) -> Optional[KnownProduct]:
+        if not cache:
+            return None
+        return cache.get(self._extract_product_id(url))
 
-                soup = BeautifulSoup(r.content, "html.parser")
-                links = soup.find_all("a", href=re.compile(r"/hot-wheels/.*/\d+/product-detail"))
+    @staticmethod
+    def _conditional_headers(cached: Optional[KnownProduct]) -> Optional[Dict[str, str]]:
+        if cached is None:
+            return None
+        headers = {}
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+        return headers or None
+
+    def _handle_product_response(self, url: str, status: int, content, headers,
+                                 cached: Optional[KnownProduct] = None) -> Optional[Dict]:
+        validators = {
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified")
+        }
+        if status == 304:
+            return self._unchanged(url, "304", validators)
+        if status != 200:
+            return None
+
+        validators["content_hash"] = self._content_hash(content)
+        if cached is not None and cached.content_hash == validators["content_hash"]:
+            return self._unchanged(url, "hash", validators)
+
+        data = self._parse_product(url, content)
+        if data:
+            data.update(validators)
+        return data
 
-                for a in links:
-                    href = a.get("href")
-                    if href:
-                        urls.add(self.BASE_URL + href)
+    def _unchanged(self, url: str, reason: str, validators: Dict) -> Optional[Dict]:
+        product_id = self._extract_product_id(url)
+        if not product_id:
+            return None
+        return {"product_id": product_id, "url": url, "unchanged": reason, **validators}
+
+    def _content_hash(self, content: bytes) -> str:
+        start = content.find(b"<body")
+        digest = hashlib.blake2b(digest_size=16)
+        if start > 0:
+            for block in self.JSON_LD_MARKUP.findall(content[:start]):
+                digest.update(block)
+        region = content[start:] if start >= 0 else content
+        digest.update(self.VOLATILE_MARKUP.sub(b"", region))
+        return digest.hexdigest()
+
+    def _stream_results(self, urls, submit) -> Iterator:
+        """Submit work while ``urls`` is still being produced and yield
+        results in completion order.
+
+        ``urls`` may be a lazy iterator (e.g. ``iter_discovered``); it is
+        drained on a feeder thread, so the first validations start as soon
+        as the first surface returns rather than after discovery finishes.
+        At most ``2 * workers`` results may be pending (queued, in flight
+        or not yet consumed); beyond that the feeder stops pulling from
+        ``urls``, so a slow consumer throttles discovery instead of
+        letting the backlog grow without bound.
+        """
+        done = queue.Queue()
+        slots = threading.BoundedSemaphore(2 * self.workers)
+        stopped = threading.Event()
+
+        def feed():
+            submitted = 0
+            try:
+                for url in urls:
+                    while not slots.acquire(timeout=0.2):
+                        if stopped.is_set():
+                            return
+                    if stopped.is_set():
+                        return
+                    submit(url).add_done_callback(done.put)
+                    submitted += 1
             except Exception as e:
                 logger.error(f"Discovery error: {e}")
+            finally:
+                done.put(submitted)
 
-        logger.info(f"Discovered {len(urls)} candidates")
-        return urls
+        threading.Thread(target=feed, name="url-feeder", daemon=True).start()
 
-    def validate_product(self, url: str) -> Optional[Dict]:
+        total, finished = None, 0
         try:
-            r = self.session.get(url, timeout=10)
-            if r.status_code != 200:
-                return None
+            while total is None or finished < total:
+                item = done.get()
+                if isinstance(item, int):
+                    total = item
+                    continue
+                finished += 1
+                slots.release()
+                yield item.result()
+        finally:
+            # Consumer finished or gave up early: let the feeder exit.
+            stopped.set()
+
+    def _parse_listing(self, content) -> Dict[str, ListingTile]:
+        """Map each product URL on a listing page to what its tile shows.
+
+        The whole page is parsed (no strainer) because stock badges and
+        prices live in the markup around the product links.
+        """
+        if self.parser == "lxml":
+            doc = self._lxml_doc(content)
+            anchors = [(a, a.get("href")) for a in doc.iter("a")]
+            # Text nodes are joined with a space, as get_text(" ") does below,
+            # so a badge split across elements reads the same in both backends.
+            return self._read_tiles(anchors, lambda n: n.getparent(),
+                                    lambda n: " ".join(self.XPATH_TILE_TEXT(n)))
+
+        soup = BeautifulSoup(content, "html.parser")
+        anchors = [(a, a.get("href")) for a in soup.find_all("a", href=self.PRODUCT_LINK)]
+        return self._read_tiles(anchors, lambda n: n.parent, lambda n: n.get_text(" "))
+
+    def _read_tiles(self, anchors, parent_of, text_of) -> Dict[str, ListingTile]:
+        """Find each product link's tile and read name/price/stock hints from it.
+
+        A link's tile is the largest enclosing element (at most
+        ``TILE_MAX_DEPTH`` levels up) that links to no other product.
+        """
+        links = []
+        ids_below = {}
+        # Nodes are keyed by id(); holding references keeps lxml from
+        # recycling element proxies (and their ids) between the two passes.
+        visited = []
+        for a, href in anchors:
+            if not href or not self.PRODUCT_LINK.search(href):
+                continue
+            product_id = self._extract_product_id(href)
+            links.append((a, href, product_id))
+            node = parent_of(a)
+            for _ in range(self.TILE_MAX_DEPTH):
+                if node is None:
+                    break
+                ids_below.setdefault(id(node), set()).add(product_id)
+                visited.append(node)
+                node = parent_of(node)
+
+        tiles = {}
+        for a, href, product_id in links:
+            url = self.BASE_URL + href
+            tile, node = a, parent_of(a)
+            for _ in range(self.TILE_MAX_DEPTH):
+                if node is None or ids_below.get(id(node)) != {product_id}:
+                    break
+                tile, node = node, parent_of(node)
+
+            text = " ".join(text_of(tile).split())
+            name = (a.get("title") or " ".join(text_of(a).split())) or None
+            lowered = text.lower()
+            if self.OUT_OF_STOCK_TEXT in lowered or self.NOTIFY_ME_TEXT in lowered:
+                stock = False
+            elif self.ADD_TO_CART_TEXT in lowered:
+                stock = True
+            else:
+                stock = None
+            # Tiles often show MRP next to the selling price; take the lower.
+            prices = [p for p in map(self._to_price, self.TILE_PRICE.findall(text)) if p is not None]
+
+            previous = tiles.get(url)
+            if previous is not None and previous.name and not name:
+                name = previous.name
+            tiles[url] = ListingTile(
+                product_id=product_id,
+                url=url,
+                name=name,
+                price=min(prices) if prices else None,
+                stock=stock
+            )
+        return tiles
 
-            soup = BeautifulSoup(r.content, "html.parser")
-            product_id = self._extract_product_id(url)
-            if not product_id:
-                return None
+    def _parse_product(self, url: str, content) -> Optional[Dict]:
+        product_id = self._extract_product_id(url)
+        if not product_id:
+            return None
 
-            name_el = soup.find("h1", class_="prod-name") or soup.find("span", itemprop="name")
-            if not name_el:
-                return None
+        fields = self._extract_fields_json_ld(content)
+        if fields:
+            source = "json-ld"
+        elif self.parser == "lxml":
+            source = "html"
+            try:
+                fields = self._extract_fields_lxml(content)
+            except Exception as e:
+                logger.warning(f"lxml parse failed, falling back to html.parser: {e}")
+                fields = self._extract_fields_soup(content)
+        else:
+            source = "html"
+            fields = self._extract_fields_soup(content)
+        if not fields:
+            return None
 
-            name = name_el.get_text(strip=True)
-            brand_verified = "hot wheels" in name.lower()
-            is_buyable = self._check_buyable(soup)
-            price = self._extract_price(soup)
+        name, price, signals = fields
+        brand_verified = "hot wheels" in name.lower()
+
+        return {
+            "product_id": product_id,
+            "name": name,
+            "url": url,
+            "price": price,
+            "is_buyable": signals.is_buyable,
+            "buy_confidence": signals.confidence,
+            "brand_verified": brand_verified,
+            "source": source
+        }
+
+    def _extract_fields_json_ld(self, content):
+        """Read name, price and availability from an embedded JSON-LD Product.
+
+        Script blocks are located with plain byte searches, so pages
+        without structured data cost a single ``find``. Returns ``None``
+        unless all three fields are present, leaving the page to the
+        DOM scrapers.
+        """
+        if not isinstance(content, bytes):
+            content = content.encode("utf-8")
+
+        for block in self._json_ld_blocks(content):
+            try:
+                data = json.loads(block)
+            except ValueError:
+                continue
+            product = self._find_json_ld_product(data)
+            if product is None:
+                continue
 
-            return {
-                "product_id": product_id,
-                "name": name,
-                "url": url,
-                "price": price,
-                "is_buyable": is_buyable,
-                "brand_verified": brand_verified
-            }
+            name = product.get("name")
+            offers = product.get("offers")
+            if isinstance(offers, list):
+                offers = offers[0] if offers else None
+            if not isinstance(name, str) or not isinstance(offers, dict):
+                continue
 
-        except Exception as e:
-            logger.error(f"Validation error: {e}")
+            availability = str(offers.get("availability", "")).rsplit("/", 1)[-1]
+            if availability in self.JSON_LD_IN_STOCK:
+                in_stock = True
+            elif availability in self.JSON_LD_OUT_OF_STOCK:
+                in_stock = False
+            else:
+                continue
+
+            raw_price = offers.get("price", offers.get("lowPrice"))
+            price = self._to_price(str(raw_price)) if raw_price is not None else None
+            if price is None:
+                continue
+
+            signals = BuyabilitySignals(
+                add_to_cart=in_stock,
+                out_of_stock=not in_stock,
+                notify_me=False,
+                price_present=True
+            )
+            return html.unescape(name).strip(), price, signals
+
+        return None
+
+    @staticmethod
+    def _json_ld_blocks(content: bytes) -> Iterator[bytes]:
+        pos = 0
+        while True:
+            marker = content.find(b"application/ld+json", pos)
+            if marker < 0:
+                return
+            start = content.find(b">", marker) + 1
+            end = content.find(b"</script", start)
+            if start <= 0 or end < 0:
+                return
+            yield content[start:end]
+            pos = end
+
+    @classmethod
+    def _find_json_ld_product(cls, data) -> Optional[Dict]:
+        if isinstance(data, list):
+            for item in data:
+                found = cls._find_json_ld_product(item)
+                if found is not None:
+                    return found
+            return None
+        if not isinstance(data, dict):
+            return None
+        kind = data.get("@type")
+        if kind == "Product" or (isinstance(kind, list) and "Product" in kind):
+            return data
+        return cls._find_json_ld_product(data.get("@graph", []))
+
+    def _extract_fields_soup(self, content):
+        page_filter = ProductPageFilter() if self.restrict_parse else None
+        soup = BeautifulSoup(content, "html.parser", parse_only=page_filter)
+
+        name_el = soup.find("h1", class_="prod-name") or soup.find("span", itemprop="name")
+        if not name_el:
             return None
 
+        name = name_el.get_text(strip=True)
+        signals, price = self._classify_soup(soup)
+        return name, price, signals
+
+    def _extract_fields_lxml(self, content):
+        doc = self._lxml_doc(content)
+
+        name_el = self._first(doc, self.XPATH_NAME)
+        if name_el is None:
+            return None
+
+        name = name_el.text_content().strip()
+        signals, price = self._classify_lxml(doc)
+        return name, price, signals
+
+    @staticmethod
+    def _lxml_doc(content):
+        # Without a charset hint libxml2 assumes Latin-1 for bytes, which
+        # mangles the rupee sign; FirstCry serves UTF-8.
+        if isinstance(content, bytes):
+            content = content.decode("utf-8", "replace")
+        return lxml_html.document_fromstring(content)
+
+    @staticmethod
+    def _first(doc, xpaths):
+        for xpath in xpaths:
+            found = xpath(doc)
+            if found:
+                return found[0]
+        return None
+
     def _extract_product_id(self, url):
         m = re.search(r"/(\d+)/product-detail", url)
         return m.group(1) if m else None
 
-    def _check_buyable(self, soup):
-        if soup.find(text=re.compile("out of stock", re.I)):
-            return False
-        if soup.find(text=re.compile("notify me", re.I)):
-            return False
-        return soup.find("button", text=re.compile("add to cart", re.I)) is not None
+    def _classify_soup(self, soup) -> Tuple["BuyabilitySignals", Optional[float]]:
+        """Collect every buyability signal and the price in one traversal.
+
+        Stock messages may sit in any text node; add-to-cart must be the
+        text of a button (icons and other markup inside it are ignored, see
+        ``_button_text``). The price comes from ``span.prod-price``,
+        falling back to ``span[itemprop=price]``.
+        """
+        out_of_stock = notify_me = add_to_cart = False
+        price_els = {}
+
+        for node in soup.descendants:
+            if isinstance(node, PreformattedString):
+                continue   # comments, doctype, CDATA: not visible text
+            if isinstance(node, NavigableString):
+                text = node.lower()
+                out_of_stock = out_of_stock or self.OUT_OF_STOCK_TEXT in text
+                notify_me = notify_me or self.NOTIFY_ME_TEXT in text
+            elif node.name == "button":
+                if not add_to_cart:
+                    add_to_cart = self.ADD_TO_CART_TEXT in self._button_text(node.strings)
+            elif node.name == "span":
+                if "prod-price" in node.get("class", ()):
+                    price_els.setdefault("class", node)
+                elif node.get("itemprop") == "price":
+                    price_els.setdefault("itemprop", node)
+
+        price_el = price_els.get("class") or price_els.get("itemprop")
+        price = self._to_price(price_el.get_text(strip=True)) if price_el else None
+        return BuyabilitySignals(add_to_cart, out_of_stock, notify_me, price is not None), price
+
+    def _classify_lxml(self, doc) -> Tuple["BuyabilitySignals", Optional[float]]:
+        """lxml twin of ``_classify_soup``.
+
+        Text nodes are collected by one C-level XPath walk and buttons and
+        spans by lxml's tag-filtered iterators, which is cheaper than
+        visiting every element from Python.
+        """
+        out_of_stock = notify_me = False
+        for text in self.XPATH_TEXT(doc):
+            text = text.lower()
+            out_of_stock = out_of_stock or self.OUT_OF_STOCK_TEXT in text
+            notify_me = notify_me or self.NOTIFY_ME_TEXT in text
+
+        add_to_cart = any(
+            self.ADD_TO_CART_TEXT in self._button_text(b.itertext()) for b in doc.iter("button")
+        )
 
-    def _extract_price(self, soup):
-        price_el = soup.find("span", class_="prod-price") or soup.find("span", itemprop="price")
-        if not price_el:
-            return None
-        txt = re.sub(r"[₹,]", "", price_el.get_text(strip=True))
+        price_els = {}
+        for el in doc.iter("span"):
+            if "prod-price" in (el.get("class") or "").split():
+                price_els.setdefault("class", el)
+                break
+            if el.get("itemprop") == "price":
+                price_els.setdefault("itemprop", el)
+
+        price_el = price_els.get("class")
+        if price_el is None:
+            price_el = price_els.get("itemprop")
+        price = self._to_price(price_el.text_content().strip()) if price_el is not None else None
+        return BuyabilitySignals(add_to_cart, out_of_stock, notify_me, price is not None), price
+
+    @staticmethod
+    def _button_text(strings) -> str:
+        """A button's text nodes joined and whitespace-collapsed, lower-cased.
+
+        Both backends read buttons through this, so ``<i></i>Add to Cart``
+        or ``Add to<br>Cart`` classify the same whichever parser is used.
+        """
+        return " ".join(" ".join(strings).split()).lower()
+
+    @staticmethod
+    def _to_price(text):
+        txt = re.sub(r"[₹,]", "", text)
         try:
             return float(txt)
         except:
             return None
 
 
+class AsyncFirstCryScraper(FirstCryScraper):
+    """aiohttp engine with the same discover/validate contract as FirstCryScraper.
+
+    An event loop runs on a private daemon thread and owns one pooled
+    keep-alive ``ClientSession``; the public methods block on it, while
+    ``validate_many`` keeps up to ``workers`` requests in flight on that
+    single thread instead of one OS thread per request.
+    """
+
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None, workers: int = 4,
+                 max_pages: int = 1, parser: Optional[str] = None, restrict_parse: bool = True,
+                 retry: Optional[RetryPolicy] = None):
+        if aiohttp is None:
+            raise RuntimeError("The async engine requires aiohttp (pip install aiohttp)")
+        self._sent = self._opened = 0     # updated on the loop thread by trace hooks
+        # The loop must be running before the base constructor opens the session on it.
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="scraper-loop", daemon=True)
+        self._thread.start()
+        super().__init__(rate_limiter, workers, max_pages, parser, restrict_parse, retry)
+        self._in_flight = asyncio.Semaphore(self.workers)
+
+    def _open_session(self):
+        return self._run(self._open_session_async())
+
+    def _open_fetch_pool(self) -> None:
+        return None    # requests and their hedges are tasks on the loop
+
+    def _close_session(self):
+        self._run(self.session.close())
+
+    async def _open_session_async(self):
+        connector = aiohttp.TCPConnector(
+            limit=2 * self.workers,    # room for a hedge next to each request
+            keepalive_timeout=30,
+            ttl_dns_cache=300
+        )
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(self._count_request)
+        trace.on_connection_create_end.append(self._count_connection)
+        return aiohttp.ClientSession(
+            headers=self.HEADERS,
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.TIMEOUT),
+            trace_configs=[trace]
+        )
+
+    async def _count_request(self, session, context, params):
+        self._sent += 1
+
+    async def _count_connection(self, session, context, params):
+        self._opened += 1
+
+    def connection_stats(self) -> Tuple[int, int]:
+        return self._sent, self._opened
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def close(self):
+        if self._loop.is_closed():
+            return
+        super().close()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    async def _aget(self, url: str, headers: Optional[Dict[str, str]] = None,
+                    budget: Optional[ScanBudget] = None):
+        await self.rate_limiter.acquire_async(budget)
+        return await self._asend(url, headers)
+
+    async def _asend(self, url: str, headers: Optional[Dict[str, str]] = None):
+        started = time.monotonic()
+        try:
+            async with self.session.get(url, headers=headers) as r:
+                body = await r.read()
+        except asyncio.TimeoutError:
+            self.rate_limiter.throttled()
+            raise
+        self.latency.record(time.monotonic() - started)
+        self._note_response(url, r.status, r.headers)
+        return r.status, body, r.headers
+
+    async def _fetch_async(self, url: str, headers: Optional[Dict[str, str]] = None,
+                           budget: Optional[ScanBudget] = None, hedge: bool = False):
+        attempt = 0
+        while True:
+            try:
+                result = await (self._hedged_aget(url, headers, budget) if hedge else self._aget(url, headers, budget))
+                outcome = result[0]
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                result, outcome = None, e
+            delay = self._retry_delay(url, attempt, outcome, budget)
+            if delay is None:
+                if result is None:
+                    raise outcome
+                return result
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _hedged_aget(self, url: str, headers: Optional[Dict[str, str]], budget: Optional[ScanBudget]):
+        await self.rate_limiter.acquire_async(budget)
+        primary = asyncio.ensure_future(self._asend(url, headers))
+        delay = self._hedge_delay()
+        if delay is None or (await asyncio.wait({primary}, timeout=delay))[0]:
+            return await primary
+        if budget is not None and not budget.spend():
+            return await primary
+        try:
+            await self.rate_limiter.acquire_async(budget)
+        except ScanBudgetExhausted:
+            return await primary
+        if primary.done():
+            return primary.result()
+        logger.info(f"Hedging slow request after {delay:.1f}s: {url}")
+        backup = asyncio.ensure_future(self._asend(url, headers))
+        error = None
+        try:
+            for attempt in asyncio.as_completed((primary, backup)):
+                try:
+                    return await attempt
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    error = error or e
+            raise error
+        finally:
+            primary.cancel()
+            backup.cancel()
+
+    def iter_discovered(self, known_ids: Collection[str] = (),
+                        budget: Optional[ScanBudget] = None) -> Iterator[ListingTile]:
+        pages = queue.Queue()
+
+        async def crawl(name, path):
+            try:
+                async for links in self._crawl_surface_async(name, path, known_ids, budget):
+                    pages.put(links)
+            finally:
+                pages.put(None)
+
+        for name, path in self.DISCOVERY_SURFACES.items():
+            asyncio.run_coroutine_threadsafe(crawl(name, path), self._loop)
+        yield from self._unique_links(pages)
+
+    def validate_product(self, url: str, cached: Optional[KnownProduct] = None,
+                         budget: Optional[ScanBudget] = None) -> Optional[Dict]:
+        return self._run(self.validate_product_async(url, cached, budget))
+
+    def validate_many(self, urls, cache: Mapping[str, KnownProduct] = None,
+                      budget: Optional[ScanBudget] = None) -> Iterator[Optional[Dict]]:
+        yield from self._stream_results(
+            urls,
+            lambda url: asyncio.run_coroutine_threadsafe(
+                self._validate_bounded(url, self._cached(url, cache), budget), self._loop
+            )
+        )
+
+    async def _crawl_surface_async(self, name: str, path: str, known_ids: Collection[str],
+                                   budget: Optional[ScanBudget] = None):
+        seen = set()
+        for url in self._surface_pages(name, path, budget):
+            links = await self._fetch_listing_async(url, budget)
+            last = self._is_last_page(links, seen, known_ids)
+            if links:
+                yield links
+            if last:
+                return
+            seen.update(links)
+
+    async def _fetch_listing_async(self, url: str, budget: Optional[ScanBudget] = None) -> Dict[str, ListingTile]:
+        try:
+            status, body, _ = await self._fetch_async(url, budget=budget)
+            if status != 200:
+                return {}
+            return self._parse_listing(body)
+        except ScanBudgetExhausted as e:
+            logger.info(f"Not crawling {url}: {e}")
+            return {}
+        except Exception as e:
+            logger.error(f"Discovery error: {e}")
+            return {}
+
+    async def validate_product_async(self, url: str, cached: Optional[KnownProduct] = None,
+                                     budget: Optional[ScanBudget] = None) -> Optional[Dict]:
+        try:
+            status, body, headers = await self._fetch_async(
+                url, self._conditional_headers(cached), budget, hedge=True
+            )
+            return self._handle_product_response(url, status, body, headers, cached)
+        except ScanBudgetExhausted as e:
+            logger.info(f"Not fetching {url}: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Validation error: {e!r}")
+            return None
+
+    async def _validate_bounded(self, url: str, cached: Optional[KnownProduct] = None,
+                                budget: Optional[ScanBudget] = None) -> Optional[Dict]:
+        async with self._in_flight:
+            return await self.validate_product_async(url, cached, budget)
+
+
 # -------------------- Telegram --------------------
 
+class Alert(NamedTuple):
+    notification: Notification
+    delivery: Future       # resolves to whether Telegram accepted the message
+
+
 class TelegramNotifier:
+    """Delivers alerts to a Telegram chat from a background thread.
+
+    ``send`` only queues the alert and returns a Future that resolves to
+    whether Telegram accepted it, so the scan never waits on the network.
+    Alerts queued within ``COALESCE_WINDOW`` seconds of each other go out
+    as one digest (split at Telegram's message size limit), so a wave of
+    new listings costs a handful of messages rather than one per product.
+    The sender thread owns a pooled session, gives each request
+    ``TIMEOUT`` seconds, keeps ``MIN_INTERVAL`` between messages, and
+    retries network errors, 429s (after Telegram's ``retry_after``) and
+    5xx responses up to ``ATTEMPTS`` times.
+    """
+
+    TIMEOUT = 10
+    ATTEMPTS = 4
+    BACKOFF = 1.0          # first retry delay; doubles each attempt
+    DRAIN_TIMEOUT = 60     # how long close() waits for queued alerts
+    COALESCE_WINDOW = 2.0
+    MIN_INTERVAL = 1.0     # Telegram allows about one message per second per chat
+    MAX_MESSAGE = 4096
+    EMOJI = {"NEW": "🆕", "RESTOCK": "🔄"}
+
     def __init__(self, token, chat_id):
         self.url = f"https://api.telegram.org/bot{token}/sendMessage"
         self.chat_id = chat_id
-
-    def send(self, product: Product, kind: str):
-        emoji = "🆕" if kind == "NEW" else "🔄"
-        msg = (
-            f"{emoji} *{kind} HOT WHEELS ALERT*\n\n"
-            f"🏎️ {product.name}\n"
-            f"💰 Price: ₹{product.price or 'N/A'}\n"
-            f"🛒 {product.url}\n"
-            f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        self.session = requests.Session()
+        self._queue: "queue.Queue[Optional[Alert]]" = queue.Queue()
+        # Alerts sent to the notifier whose delivery is not settled yet,
+        # including the digest the sender thread is working on.
+        self._unanswered = 0
+        self._unanswered_lock = threading.Lock()
+        self._last_sent = 0.0
+        self._thread = threading.Thread(target=self._run, name="telegram", daemon=True)
+        self._thread.start()
+
+    def send(self, notification: Notification) -> Future:
+        alert = Alert(notification, Future())
+        with self._unanswered_lock:
+            self._unanswered += 1
+        self._queue.put(alert)
+        return alert.delivery
+
+    def format(self, alert: Alert) -> str:
+        n = alert.notification
+        return (
+            f"{self.EMOJI.get(n.kind, '🔔')} *{n.kind} HOT WHEELS ALERT*\n\n"
+            f"🏎️ {self._escape(n.name)}\n"
+            f"💰 Price: ₹{n.price or 'N/A'}\n"
+            f"🛒 {n.url}\n"
+            f"⏰ {self._timestamp(n)}"
         )
 
-        r = requests.post(self.url, json={
-            "chat_id": self.chat_id,
-            "text": msg,
-            "parse_mode": "Markdown"
-        })
-
-        return r.status_code == 200
+    def format_digest(self, alerts: List[Alert]) -> List[Tuple[str, List[Alert]]]:
+        """Pack several alerts into as few messages as fit ``MAX_MESSAGE``.
+
+        Returns each message with the alerts it carries.
+        """
+        footer = f"⏰ {self._timestamp(alerts[-1].notification)}"
+        header_room = self._length("🚨 *9999 HOT WHEELS ALERTS*\n\n" + footer)
+        chunks: List[List[Tuple[str, Alert]]] = [[]]
+        size = header_room
+        for alert in alerts:
+            n = alert.notification
+            entry = (
+                f"{self.EMOJI.get(n.kind, '🔔')} {n.kind}: {self._escape(n.name)}"
+                f" - ₹{n.price or 'N/A'}\n🛒 {n.url}\n\n"
+            )
+            if chunks[-1] and size + self._length(entry) > self.MAX_MESSAGE:
+                chunks.append([])
+                size = header_room
+            chunks[-1].append((entry, alert))
+            size += self._length(entry)
+
+        messages = []
+        for chunk in chunks:
+            if len(chunk) == 1:
+                messages.append((self.format(chunk[0][1]), [chunk[0][1]]))
+                continue
+            text = f"🚨 *{len(chunk)} HOT WHEELS ALERTS*\n\n" + "".join(e for e, _ in chunk) + footer
+            messages.append((text, [a for _, a in chunk]))
+        return messages
+
+    @staticmethod
+    def _timestamp(notification: Notification) -> str:
+        return datetime.fromisoformat(notification.created_at).strftime('%Y-%m-%d %H:%M:%S')
+
+    @staticmethod
+    def _length(text: str) -> int:
+        # Telegram counts message length in UTF-16 code units; emoji take two.
+        return len(text.encode("utf-16-le")) // 2
+
+    @staticmethod
+    def _escape(text: Optional[str]) -> str:
+        # Markdown control characters in a product name would make Telegram
+        # reject the whole message, taking every alert in a digest with it.
+        return re.sub(r"([_*`\[])", r"\\\1", text or "")
+
+    def close(self, timeout: Optional[float] = None):
+        """Deliver what is still queued (for up to ``timeout`` seconds, at
+        most DRAIN_TIMEOUT), then stop."""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join(self.DRAIN_TIMEOUT if timeout is None else min(timeout, self.DRAIN_TIMEOUT))
+        if self._thread.is_alive():
+            logger.warning(f"Gave up on {self._unanswered} undelivered Telegram alerts")
+        self.session.close()
+
+    def _run(self):
+        while True:
+            alerts, stopping = self._collect()
+            for text, carried in self.format_digest(alerts) if alerts else ():
+                try:
+                    delivered = self._deliver(text)
+                except Exception as e:
+                    logger.error(f"Telegram error: {e!r}")
+                    delivered = False
+                with self._unanswered_lock:
+                    self._unanswered -= len(carried)
+                for alert in carried:
+                    alert.delivery.set_result(delivered)
+            if stopping:
+                return
+
+    def _collect(self) -> Tuple[List[Alert], bool]:
+        """Wait for an alert, then gather whatever else arrives within
+        ``COALESCE_WINDOW``. Also reports whether ``close`` was called."""
+        first = self._queue.get()
+        if first is None:
+            return [], True
+        alerts = [first]
+        window_ends = time.monotonic() + self.COALESCE_WINDOW
+        while True:
+            remaining = window_ends - time.monotonic()
+            try:
+                alert = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                return alerts, False
+            if alert is None:
+                return alerts, True
+            alerts.append(alert)
+
+    def _deliver(self, text: str) -> bool:
+        error = None
+        for attempt in range(self.ATTEMPTS):
+            retry_after = None
+            pause = self._last_sent + self.MIN_INTERVAL - time.monotonic()
+            if pause > 0:
+                time.sleep(pause)
+            self._last_sent = time.monotonic()
+            try:
+                r = self.session.post(self.url, json={
+                    "chat_id": self.chat_id,
+                    "text": text,
+                    "parse_mode": "Markdown"
+                }, timeout=self.TIMEOUT)
+            except requests.RequestException as e:
+                error = repr(e)
+            else:
+                if r.status_code == 200:
+                    return True
+                error = f"HTTP {r.status_code}: {r.text[:200]}"
+                if r.status_code == 429:
+                    retry_after = self._telegram_retry_after(r)
+                elif r.status_code < 500:
+                    break     # bad request, wrong chat, ...: retrying will not help
+            if attempt + 1 < self.ATTEMPTS:
+                time.sleep(retry_after or self.BACKOFF * 2 ** attempt)
+        logger.error(f"Telegram alert not delivered ({error})")
+        return False
+
+    @staticmethod
+    def _telegram_retry_after(r) -> Optional[float]:
+        try:
+            return float(r.json()["parameters"]["retry_after"])
+        except (ValueError, KeyError, TypeError):
+            return RateLimiter.parse_retry_after(r.headers.get("Retry-After"))
+
+
+# -------------------- Scheduling --------------------
+
+class RevalidationScheduler:
+    """Chooses which known products get their detail page re-fetched.
+
+    Each product gets a revalidation interval from its state and its
+    ``state_transitions`` history: items that have restocked recently
+    are checked every scan, in-stock and recently active items every
+    few minutes, and long-dead out-of-stock items a few times a day.
+    Due products are ranked by how overdue they are and cut off at the
+    per-scan budget.
+    """
+
+    HOT_WINDOW = timedelta(days=7)
+    BUYABLE_INTERVAL = 10 * 60
+    ACTIVE_INTERVAL = 15 * 60
+    DORMANT_INTERVAL = 6 * 60 * 60
+
+    def __init__(self, history: Dict[str, TransitionStats]):
+        self.history = history
+
+    @classmethod
+    def hot_window_start(cls, now: datetime) -> str:
+        return (now - cls.HOT_WINDOW).isoformat()
+
+    def interval(self, product_id: str, known: KnownProduct) -> float:
+        """Seconds between detail checks for this product."""
+        stats = self.history.get(product_id)
+        if stats is not None and stats.restocks:
+            return 0
+        recent = stats is not None and stats.recent > 0
+        if known.state == ProductState.BUYABLE:
+            return self.BUYABLE_INTERVAL
+        if recent:
+            return self.ACTIVE_INTERVAL
+        return self.DORMANT_INTERVAL
+
+    def pick(self, candidates: Dict[str, KnownProduct], budget: int, now: datetime) -> List[str]:
+        """Return the product IDs to revalidate, most overdue first."""
+        due = []
+        for product_id, known in candidates.items():
+            if not known.url:
+                continue
+            interval = self.interval(product_id, known)
+            if known.last_checked is None:
+                elapsed = float("inf")
+            else:
+                elapsed = (now - datetime.fromisoformat(known.last_checked)).total_seconds()
+            if elapsed >= interval:
+                # Hot items (interval 0) outrank everything; the rest are
+                # ordered by how many intervals they are overdue.
+                overdue = elapsed / interval if interval else float("inf")
+                due.append((overdue, product_id))
+
+        due.sort(reverse=True)
+        if len(due) > budget:
+            logger.info(f"Revalidation budget reached: deferring {len(due) - budget} due products")
+        return [product_id for _, product_id in due[:budget]]
 
 
 # -------------------- Monitor --------------------
 
+@dataclass
+class MonitorConfig:
+    workers: int = 4           # concurrent product validations
+    engine: str = "threads"    # "threads" (requests) or "async" (aiohttp)
+    max_pages: int = 5         # listing pages crawled per discovery surface
+    parser: str = "lxml"       # HTML backend; falls back to html.parser without lxml
+    trust_listing: bool = True # skip detail pages when the listing tile shows no change
+    detail_budget: int = 200   # scheduled revalidations fill detail fetches up to this many per scan
+    rate: float = 2.0          # max requests per second to FirstCry
+    burst: float = 3.0         # requests that may go out back to back before the rate applies
+    retries: int = 2           # extra attempts after a failed request
+    hedge_percentile: float = 95.0  # hedge product requests slower than this latency percentile; 0 disables
+    deadline: Optional[float] = None     # seconds a scan may run; None for no limit
+    max_requests: Optional[int] = None   # HTTP requests per scan; None for no limit
+    interval: float = 120.0              # seconds between scan starts when running continuously
+    revalidate_interval: float = 120.0   # seconds between scans that include scheduled revalidations
+    jitter: float = 0.1                  # random +/- fraction of interval added to each wait
+    db_path: str = "hotwheels_products.db"
+
+
 class HotWheelsMonitor:
-    def __init__(self, token, chat_id):
-        self.db = ProductDatabase()
-        self.scraper = FirstCryScraper()
+    # Seconds between mid-scan commits, so a killed run loses little work.
+    CHECKPOINT_INTERVAL = 20.0
+    # Seconds a queued alert may wait for that commit; a restock burst is
+    # committed (and sent) together instead of one transaction per product.
+    ALERT_FLUSH_DELAY = 2.0
+    # Undelivered alerts are re-sent every scan until they are this old;
+    # past that a restock alert is no longer worth sending.
+    OUTBOX_MAX_AGE = timedelta(hours=24)
+
+    def __init__(self, token, chat_id, config: Optional[MonitorConfig] = None):
+        self.config = config or MonitorConfig()
+        self.db = ProductDatabase(self.config.db_path)
+        engine = AsyncFirstCryScraper if self.config.engine == "async" else FirstCryScraper
+        self.scraper = engine(
+            RateLimiter(self.config.rate, burst=self.config.burst),
+            workers=self.config.workers,
+            max_pages=self.config.max_pages,
+            parser=self.config.parser,
+            retry=RetryPolicy(
+                attempts=self.config.retries + 1,
+                hedge_percentile=self.config.hedge_percentile or None
+            )
+        )
         self.notifier = TelegramNotifier(token, chat_id)
+        self._stopping = threading.Event()
+        self._budget: Optional[ScanBudget] = None
+        # When the last scan must be over by (time.monotonic()), with --deadline.
+        self._deadline_at: Optional[float] = None
+        # Outbox keys handed to the notifier and not yet answered.
+        self._in_flight: Set[str] = set()
+        self._in_flight_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.scraper.close()
+        # Queued alerts still record their delivery in the database. With a
+        # deadline they are only waited on until the last scan's deadline;
+        # the outbox re-sends whatever is left on the next run.
+        drain = None
+        if self._deadline_at is not None:
+            drain = max(0.0, self._deadline_at - time.monotonic())
+        self.notifier.close(drain)
+        self.db.close()
+
+    def stop(self):
+        """Ask ``run_forever`` to exit and wind the current scan down.
+
+        The running scan stops handing out requests, lets those in flight
+        finish and commits, leaving the rest in the scan queue. Safe to
+        call from a signal handler.
+        """
+        self._stopping.set()
+        budget = self._budget
+        if budget is not None:
+            budget.exhaust()
+
+    def run_forever(self):
+        """Scan at a fixed rate until ``stop`` is called.
+
+        Scans start every ``config.interval`` seconds measured from the
+        previous start, so scan time is not added on top of the wait; a
+        scan that overruns skips the ticks it missed instead of starting
+        the next one straight away. Each wait is jittered so requests do
+        not land on an exact period. Scheduled revalidation of known
+        products runs on its own, usually slower, cadence; the other scans
+        only crawl discovery surfaces and fetch what their tiles flag. That
+        cadence is judged on the unjittered tick schedule, so a scan that
+        jitters early is not mistaken for one that came too soon.
+        """
+        cfg = self.config
+        origin = time.monotonic()
+        tick = 0                    # index of this scan's unjittered start
+        last_revalidation = None    # tick of the last revalidating scan
+        while not self._stopping.is_set():
+            started = time.monotonic()
+            revalidate = (last_revalidation is None
+                          or (tick - last_revalidation) * cfg.interval >= cfg.revalidate_interval)
+            try:
+                self.run_scan(revalidate=revalidate)
+            except Exception as e:
+                logger.exception(f"Scan failed: {e}")
+            if revalidate:
+                last_revalidation = tick
+
+            tick += 1
+            now = time.monotonic()
+            next_tick = origin + tick * cfg.interval
+            if next_tick < now:
+                missed = int((now - next_tick) // cfg.interval) + 1
+                logger.warning(
+                    f"Scan took {now - started:.0f}s, longer than the {cfg.interval:.0f}s "
+                    f"interval; skipping {missed} tick(s)"
+                )
+                tick += missed
+                next_tick = origin + tick * cfg.interval
+            wait = next_tick - now + random.uniform(-cfg.jitter, cfg.jitter) * cfg.interval
+            self._stopping.wait(max(0.0, wait))
+        logger.info("Monitor stopped")
 
     def should_notify(self, old_state, new_state):
         # Notify on first discovery
@@ -288,21 +2162,216 @@ class HotWheelsMonitor:
 
         return False, None
 
-    def run_scan(self):
-        logger.info("Starting scan")
-        urls = self.scraper.discover_products()
-
+    def needs_detail(self, tile: ListingTile, known: Optional[KnownProduct]) -> bool:
+        """Whether a listing tile leaves the product's state in doubt.
+
+        New products, tiles without a stock badge, and tiles whose badge
+        or price disagrees with the stored row need their detail page;
+        everything else is taken as unchanged. ``run_scan`` hands
+        badge-less tiles of known products to the revalidation scheduler.
+        """
+        if known is None or tile.stock is None:
+            return True
+        listed_state = ProductState.BUYABLE if tile.stock else ProductState.OUT_OF_STOCK
+        if listed_state != known.state:
+            return True
+        return tile.price is not None and known.price is not None and abs(tile.price - known.price) >= 0.01
+
+    def _scan_budget(self) -> ScanBudget:
+        """Budget for one scan's requests.
+
+        New requests stop early enough for the ones already handed to the
+        scraper (up to ``2 * workers``, paced by the rate limit) to finish
+        or time out before ``config.deadline``.
+        """
+        deadline = self.config.deadline
+        if deadline is not None:
+            drain = 2 * self.config.workers / self.config.rate if self.config.rate > 0 else 0.0
+            deadline = max(0.0, deadline - drain - self.scraper.TIMEOUT)
+        budget = ScanBudget(deadline, self.config.max_requests)
+        if self._stopping.is_set():
+            budget.exhaust()
+        return budget
+
+    @staticmethod
+    def _log_resume(state: Dict[str, str], resumed: List[PendingDetail]):
+        started = state.get("scan_started")
+        if started and state.get("scan_finished", "") < started:
+            logger.warning(
+                f"Previous scan (started {started}) did not finish; resuming from its "
+                f"last checkpoint ({state.get('checkpoint_at', 'none')})"
+            )
+        if resumed:
+            logger.info(f"{len(resumed)} detail fetches left over from the previous scan go first")
+
+    def run_scan(self, revalidate: bool = True):
+        """Crawl the discovery surfaces and validate what they turned up.
+
+        With ``revalidate`` false, known products are only re-fetched when
+        their listing tile changed; the revalidation scheduler is skipped.
+        """
+        logger.info("Starting scan" if revalidate else "Starting discovery scan")
+        started = datetime.now()
+        self._redeliver_outbox()
+        connections_before = self.scraper.connection_stats()
+        index = self.db.load_index()
+        scheduler = RevalidationScheduler(
+            self.db.load_transition_stats(RevalidationScheduler.hot_window_start(started))
+        )
+        # Known products whose fate this scan is not settled by their tile.
+        undecided = dict(index)
+        listing_only = []
+        scheduled = []
+        if self.config.deadline is not None:
+            self._deadline_at = time.monotonic() + self.config.deadline
+        budget = self._budget = self._scan_budget()
+        resumed = self.db.load_scan_queue()
+        deferred: List[PendingDetail] = []
+        self._log_resume(self.db.load_scan_state(), resumed)
+
+        # Detail fetches not yet completed, written to the queue at every
+        # checkpoint so a killed run is resumed by the next one.
+        outstanding = {item.product_id: item for item in resumed}
+        outstanding_lock = threading.Lock()
+
+        def remember(item: PendingDetail):
+            with outstanding_lock:
+                outstanding[item.product_id] = item
+
+        def detail_urls():
+            # Runs on the scraper's feeder thread; it only reads the index
+            # and appends to the lists above. Work is handed out by
+            # DetailPriority: new products and restock candidates as soon as
+            # their tile is seen, everything else once discovery is done.
+            # When the scan budget runs out, the rest goes to ``deferred``.
+            fetched = 0
+            queued = set()
+
+            def take(item: PendingDetail) -> bool:
+                nonlocal fetched
+                if item.product_id in queued:
+                    return False
+                queued.add(item.product_id)
+                remember(item)
+                if deferred or not budget.spend():
+                    deferred.append(item)
+                    return False
+                if item.priority != DetailPriority.SCHEDULED:
+                    fetched += 1
+                return True
+
+            later = []
+            for item in resumed:
+                if item.priority > DetailPriority.RESTOCK:
+                    later.append(item)
+                elif take(item):
+                    yield item.url
+
+            for tile in self.scraper.iter_discovered(known_ids=index.keys(), budget=budget):
+                known = undecided.pop(tile.product_id, None)
+                if tile.product_id in queued:
+                    continue
+                if known is None:
+                    if take(PendingDetail(tile.product_id, tile.url, DetailPriority.NEW)):
+                        yield tile.url
+                elif not self.config.trust_listing:
+                    # --always-fetch-details: every listed product is re-fetched.
+                    if tile.stock and known.state != ProductState.BUYABLE:
+                        if take(PendingDetail(tile.product_id, tile.url, DetailPriority.RESTOCK)):
+                            yield tile.url
+                    else:
+                        later.append(PendingDetail(tile.product_id, tile.url, DetailPriority.CHANGED))
+                        remember(later[-1])
+                elif tile.stock is None:
+                    undecided[tile.product_id] = known._replace(url=tile.url)
+                elif not self.needs_detail(tile, known):
+                    listing_only.append(tile.product_id)
+                elif tile.stock and known.state != ProductState.BUYABLE:
+                    if take(PendingDetail(tile.product_id, tile.url, DetailPriority.RESTOCK)):
+                        yield tile.url
+                else:
+                    later.append(PendingDetail(tile.product_id, tile.url, DetailPriority.CHANGED))
+                    remember(later[-1])
+
+            later.sort(key=lambda item: item.priority)
+            for item in later:
+                if take(item):
+                    yield item.url
+
+            if not revalidate:
+                return
+            remaining = {pid: known for pid, known in undecided.items() if pid not in queued}
+            detail_budget = max(0, self.config.detail_budget - fetched)
+            for product_id in scheduler.pick(remaining, detail_budget, started):
+                if take(PendingDetail(product_id, remaining[product_id].url, DetailPriority.SCHEDULED)):
+                    scheduled.append(product_id)
+                    yield remaining[product_id].url
+
+        batch = ScanBatch()
+        # Products written with new details, and products only seen again.
+        saved: Set[str] = set()
+        touched: Set[str] = set()
+        last_flush = time.monotonic()
+        alerts_since = None
+
+        def flush(pending: Optional[List[PendingDetail]], **state: str):
+            nonlocal last_flush, alerts_since
+            batch.pending = pending
+            batch.state.update(state)
+            self.db.commit_batch(batch)
+            saved.update(batch.products)
+            touched.update(batch.touched)
+            # Alerts are handed over only once their outbox entries (with
+            # the product and transition) are committed, so they survive a
+            # crash and a resumed scan does not raise them a second time.
+            alerts = list(batch.notifications)
+            batch.clear()
+            last_flush = time.monotonic()
+            alerts_since = None
+            for notification in alerts:
+                self._dispatch(notification)
+
+        def checkpoint():
+            with outstanding_lock:
+                pending = sorted(outstanding.values(), key=lambda item: item.priority)
+            flush(pending, checkpoint_at=datetime.now().isoformat())
+
+        flush(None, scan_started=started.isoformat())
         sent = 0
-        for url in urls:
-            data = self.scraper.validate_product(url)
-            if not data or not data["brand_verified"]:
+        unchanged = {"304": 0, "hash": 0}
+        # Results are consumed on this thread, so the index, batch and
+        # notifier are never touched concurrently.
+        for data in self.scraper.validate_many(detail_urls(), cache=index, budget=budget):
+            if (time.monotonic() - last_flush >= self.CHECKPOINT_INTERVAL
+                    or alerts_since is not None
+                    and time.monotonic() - alerts_since >= self.ALERT_FLUSH_DELAY):
+                checkpoint()
+            if not data:
+                continue
+
+            with outstanding_lock:
+                outstanding.pop(data["product_id"], None)
+
+            existing = index.get(data["product_id"])
+            now = datetime.now().isoformat()
+            if data.get("unchanged"):
+                if existing:
+                    batch.touch(data["product_id"], now, data["etag"],
+                                data["last_modified"], data.get("content_hash"), checked=True)
+                    unchanged[data["unchanged"]] += 1
+                continue
+
+            if not data["brand_verified"]:
                 continue
 
-            existing = self.db.get_product(data["product_id"])
             old_state = existing.state if existing else None
             new_state = ProductState.BUYABLE if data["is_buyable"] else ProductState.OUT_OF_STOCK
+            if data["buy_confidence"] < 0.8:
+                logger.info(
+                    f"Weak stock signals for {data['product_id']} "
+                    f"(confidence {data['buy_confidence']:.1f}), treating as {new_state.value}"
+                )
 
-            now = datetime.now().isoformat()
             product = Product(
                 product_id=data["product_id"],
                 name=data["name"],
@@ -311,27 +2380,176 @@ class HotWheelsMonitor:
                 state=new_state,
                 last_seen=now,
                 first_discovered=existing.first_discovered if existing else now,
-                brand_verified=True
+                brand_verified=True,
+                etag=data["etag"],
+                last_modified=data["last_modified"],
+                content_hash=data["content_hash"]
             )
 
             notify, kind = self.should_notify(old_state, new_state)
 
-            self.db.save_product(product)
+            fingerprint = product.fingerprint()
+            if existing and existing.fingerprint == fingerprint:
+                batch.touch(product.product_id, now, product.etag,
+                            product.last_modified, product.content_hash, checked=True)
+            else:
+                batch.add_product(product)
+            index[product.product_id] = KnownProduct(
+                state=new_state,
+                price=product.price,
+                first_discovered=product.first_discovered,
+                fingerprint=fingerprint,
+                etag=product.etag,
+                last_modified=product.last_modified,
+                content_hash=product.content_hash,
+                url=product.url,
+                last_checked=now
+            )
+
+            transition = None
             if old_state != new_state:
-                self.db.log_transition(data["product_id"], old_state, new_state, notify)
+                transition = Transition(data["product_id"], old_state, new_state, now)
+                batch.add_transition(transition)
 
             if notify:
-                if self.notifier.send(product, kind):
-                    sent += 1
-
-            time.sleep(0.5)
+                notification = Notification.for_transition(product, kind, transition)
+                batch.add_notification(notification)
+                if alerts_since is None:
+                    alerts_since = time.monotonic()
+                sent += 1
+
+        now = datetime.now().isoformat()
+        for product_id in listing_only:
+            batch.touch(product_id, now)
+
+        if budget.exhausted():
+            # Fetches cut short by the deadline (not only those never
+            # started) are carried over too.
+            with outstanding_lock:
+                deferred = sorted(outstanding.values(), key=lambda item: item.priority)
+        flush(deferred, scan_finished=now)
+        if deferred:
+            logger.info(f"Scan budget spent; {len(deferred)} detail fetches carried over to the next scan")
+        logger.info(
+            f"Scan done. Products saved: {len(saved)}. "
+            f"Unchanged products seen: {len(touched - saved)}. "
+            f"Detail fetches skipped (listing unchanged): {len(listing_only)}. "
+            f"Revalidated by schedule: {len(scheduled)}. "
+            f"Not modified (304): {unchanged['304']}. "
+            f"Parses skipped (unchanged body): {unchanged['hash']}. Notifications queued: {sent}"
+        )
+        self._log_connections(connections_before)
+
+    def _dispatch(self, notification: Notification):
+        """Hand a committed outbox entry to the notifier without waiting for it."""
+        with self._in_flight_lock:
+            if notification.key in self._in_flight:
+                return
+            self._in_flight.add(notification.key)
+        self.notifier.send(notification).add_done_callback(
+            lambda delivery: self._record_delivery(notification, delivery.result())
+        )
 
-        logger.info(f"Scan done. Notifications sent: {sent}")
+    def _record_delivery(self, notification: Notification, delivered: bool):
+        # Runs on the notifier's thread once Telegram has answered, which
+        # can be after close() gave up waiting and closed the database; the
+        # outbox entry then simply stays pending for the next run.
+        try:
+            if delivered:
+                if not self.db.mark_delivered(notification):
+                    logger.warning(
+                        f"Alert {notification.key} was delivered after shutdown; "
+                        f"the next run will send it again"
+                    )
+                return
+            failures = self.db.mark_failed(notification)
+            if failures is None:
+                return
+            if datetime.fromisoformat(notification.created_at) < datetime.now() - self.OUTBOX_MAX_AGE:
+                logger.error(
+                    f"Dropping alert {notification.key}: undelivered for "
+                    f"{self.OUTBOX_MAX_AGE} after {failures} attempts"
+                )
+            else:
+                logger.debug(f"Alert {notification.key} not delivered; it stays in the outbox")
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.discard(notification.key)
+
+    def _redeliver_outbox(self):
+        """Re-send alerts a previous scan or run could not deliver."""
+        pending = self.db.load_outbox((datetime.now() - self.OUTBOX_MAX_AGE).isoformat())
+        with self._in_flight_lock:
+            pending = [n for n in pending if n.key not in self._in_flight]
+        if pending:
+            logger.info(f"Re-sending {len(pending)} undelivered alerts from the outbox")
+        for notification in pending:
+            self._dispatch(notification)
+
+    def _log_connections(self, before: Tuple[int, int]):
+        sent, opened = (now - then for now, then in zip(self.scraper.connection_stats(), before))
+        if sent:
+            logger.info(
+                f"HTTP: {sent} requests over {opened} new connections "
+                f"({1 - opened / sent:.0%} keep-alive reuse)"
+            )
 
 
 # -------------------- Entry --------------------
 
+def parse_args(argv=None):
+    defaults = MonitorConfig()
+    parser = argparse.ArgumentParser(description="FirstCry Hot Wheels restock monitor")
+    parser.add_argument("--once", action="store_true",
+                        help="run a single scan and exit")
+    parser.add_argument("--workers", type=int, default=defaults.workers,
+                        help="concurrent product validations (default: %(default)s)")
+    parser.add_argument("--engine", choices=("threads", "async"), default=defaults.engine,
+                        help="HTTP engine: requests thread pool or aiohttp event loop (default: %(default)s)")
+    parser.add_argument("--max-pages", type=int, default=defaults.max_pages,
+                        help="listing pages crawled per surface; crawling stops early "
+                             "once a page holds only known products (default: %(default)s)")
+    parser.add_argument("--parser", choices=FirstCryScraper.PARSERS, default=defaults.parser,
+                        help="HTML parser backend (default: %(default)s)")
+    parser.add_argument("--always-fetch-details", dest="trust_listing", action="store_false",
+                        help="fetch the product page of every listed product, even when its "
+                             "listing tile shows no change")
+    parser.add_argument("--detail-budget", type=int, default=defaults.detail_budget,
+                        help="budget for scheduled revalidation: it fills a scan's product page "
+                             "fetches up to this many; pages of new and changed products are never "
+                             "capped but count towards it (default: %(default)s)")
+    parser.add_argument("--rate", type=float, default=defaults.rate,
+                        help="max requests per second to FirstCry; lowered automatically while "
+                             "the site answers 429/503 (default: %(default)s)")
+    parser.add_argument("--burst", type=float, default=defaults.burst,
+                        help="requests allowed back to back before --rate applies (default: %(default)s)")
+    parser.add_argument("--retries", type=int, default=defaults.retries,
+                        help="retries after a failed request, with exponential backoff (default: %(default)s)")
+    parser.add_argument("--hedge-percentile", type=float, metavar="P", default=defaults.hedge_percentile,
+                        help="send a duplicate request for product pages slower than the P-th "
+                             "percentile of recent responses; 0 disables (default: %(default)s)")
+    parser.add_argument("--deadline", type=float, metavar="SECONDS", default=defaults.deadline,
+                        help="finish a scan, and with --once the whole run, within this many "
+                             "seconds; unfinished product pages are fetched first by the next scan "
+                             "and undelivered alerts are re-sent (default: no limit)")
+    parser.add_argument("--max-requests", type=int, metavar="N", default=defaults.max_requests,
+                        help="max HTTP requests per scan, listing pages included (default: no limit)")
+    parser.add_argument("--interval", type=float, metavar="SECONDS", default=defaults.interval,
+                        help="without --once: seconds between scan starts; scan time counts "
+                             "towards it (default: %(default)s)")
+    parser.add_argument("--revalidate-every", dest="revalidate_interval", type=float, metavar="SECONDS",
+                        default=defaults.revalidate_interval,
+                        help="without --once: how often a scan also revalidates known products "
+                             "on schedule; other scans only follow the listings (default: %(default)s)")
+    parser.add_argument("--jitter", type=float, metavar="FRACTION", default=defaults.jitter,
+                        help="random +/- fraction of --interval added to each wait (default: %(default)s)")
+    parser.add_argument("--db", dest="db_path", default=defaults.db_path,
+                        help="SQLite database path (default: %(default)s)")
+    return parser.parse_args(argv)
+
+
 def main():
+    args = parse_args()
     token = os.getenv("TELEGRAM_BOT_TOKEN")
     chat_id = os.getenv("TELEGRAM_CHAT_ID")
 
@@ -339,14 +2557,39 @@ def main():
         logger.error("Missing Telegram credentials")
         return
 
-    monitor = HotWheelsMonitor(token, chat_id)
-
-    if "--once" in sys.argv:
-        monitor.run_scan()
-    else:
-        while True:
+    config = MonitorConfig(
+        workers=args.workers,
+        engine=args.engine,
+        max_pages=args.max_pages,
+        parser=args.parser,
+        trust_listing=args.trust_listing,
+        detail_budget=args.detail_budget,
+        rate=args.rate,
+        burst=args.burst,
+        retries=args.retries,
+        hedge_percentile=args.hedge_percentile,
+        deadline=args.deadline,
+        max_requests=args.max_requests,
+        interval=args.interval,
+        revalidate_interval=args.revalidate_interval,
+        jitter=args.jitter,
+        db_path=args.db_path
+    )
+
+    with HotWheelsMonitor(token, chat_id, config) as monitor:
+        def request_stop(signum, frame):
+            logger.info(f"Received {signal.Signals(signum).name}, finishing the current scan")
+            # A second signal kills the process outright.
+            signal.signal(signum, signal.SIG_DFL)
+            monitor.stop()
+
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, request_stop)
+
+        if args.once:
             monitor.run_scan()
-            time.sleep(120)
+        else:
+            monitor.run_forever()
 
 
 if __name__ == "__main__":
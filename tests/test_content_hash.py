@@ -0,0 +1,54 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hotwheels_monitor import FirstCryScraper, KnownProduct, ProductState  # noqa: E402
+
+URL = "https://www.firstcry.com/hot-wheels/car/12345/product-detail"
+
+
+def json_ld_page(availability, token="a", in_head=True):
+    """A product page whose only stock signal is its JSON-LD block."""
+    json_ld = (
+        '<script type="application/ld+json">'
+        '{"@type": "Product", "name": "Hot Wheels Car", "sku": "12345",'
+        ' "brand": {"@type": "Brand", "name": "Hot Wheels"},'
+        ' "offers": {"@type": "Offer", "price": "199",'
+        f' "availability": "https://schema.org/{availability}"}}}}'
+        '</script>'
+    )
+    tracking = f'<script>window.token = "{token}";</script>'
+    head = json_ld if in_head else ""
+    body = "" if in_head else json_ld
+    return (f"<html><head>{head}{tracking}</head><body>{body}{tracking}"
+            "<div>Hot Wheels Car</div></body></html>").encode()
+
+
+def cached_for(scraper, content):
+    return KnownProduct(ProductState.OUT_OF_STOCK, 199.0, "2024-01-01T00:00:00", None,
+                        content_hash=scraper._content_hash(content))
+
+
+def test_json_ld_availability_change_is_parsed():
+    scraper = FirstCryScraper(parser="html.parser")
+    try:
+        for in_head in (True, False):
+            old = json_ld_page("OutOfStock", in_head=in_head)
+            new = json_ld_page("InStock", in_head=in_head)
+            data = scraper._handle_product_response(URL, 200, new, {}, cached_for(scraper, old))
+            assert "unchanged" not in data
+            assert data["is_buyable"] is True
+    finally:
+        scraper.close()
+
+
+def test_other_scripts_do_not_change_the_hash():
+    scraper = FirstCryScraper(parser="html.parser")
+    try:
+        old = json_ld_page("OutOfStock", token="a")
+        new = json_ld_page("OutOfStock", token="b")
+        data = scraper._handle_product_response(URL, 200, new, {}, cached_for(scraper, old))
+        assert data["unchanged"] == "hash"
+    finally:
+        scraper.close()
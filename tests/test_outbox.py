@@ -0,0 +1,72 @@
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hotwheels_monitor import HotWheelsMonitor, MonitorConfig, Notification, ScanBatch  # noqa: E402
+
+
+def notification(n=1):
+    return Notification(
+        key=f"{n}:NEW:2024-01-01T00:00:0{n}", product_id=str(n), kind="NEW",
+        name=f"Hot Wheels Car {n}", url=f"https://www.firstcry.com/hot-wheels/car/{n}/product-detail",
+        price=199.0, created_at=f"2024-01-01T00:00:0{n}"
+    )
+
+
+def test_delivery_finishing_after_close_leaves_the_alert_pending(tmp_path, caplog, monkeypatch):
+    db_path = str(tmp_path / "t.db")
+    monitor = HotWheelsMonitor("token", "chat", MonitorConfig(db_path=db_path))
+    monkeypatch.setattr(monitor.notifier, "DRAIN_TIMEOUT", 0.1)
+    release = threading.Event()
+
+    def slow_deliver(text):
+        release.wait(5)
+        return True
+
+    monitor.notifier._deliver = slow_deliver
+    monitor.notifier.COALESCE_WINDOW = 0
+    batch = ScanBatch()
+    pending = [notification(1), notification(2)]
+    for n in pending:
+        batch.add_notification(n)
+    monitor.db.commit_batch(batch)
+    for n in pending:
+        monitor._dispatch(n)
+
+    with caplog.at_level(logging.WARNING):
+        monitor.close()
+        assert "Gave up on 2 undelivered Telegram alerts" in caplog.text
+        release.set()
+        monitor.notifier._thread.join(5)
+    assert not monitor.notifier._thread.is_alive()
+    assert "exception calling callback" not in caplog.text
+    assert "delivered after shutdown" in caplog.text
+
+    conn = sqlite3.connect(db_path)
+    undelivered = conn.execute("SELECT COUNT(*) FROM notifications WHERE delivered_at IS NULL").fetchone()[0]
+    conn.close()
+    assert undelivered == 2
+
+
+def test_close_stops_waiting_for_alerts_at_the_scan_deadline(tmp_path):
+    monitor = HotWheelsMonitor("token", "chat", MonitorConfig(db_path=str(tmp_path / "t.db"), deadline=90))
+    release = threading.Event()
+
+    def stalled_deliver(text):
+        release.wait(5)
+        return False
+
+    monitor.notifier._deliver = stalled_deliver
+    monitor._deadline_at = time.monotonic() + 0.2    # as left by a scan that ran almost 90s
+    monitor._dispatch(notification(1))
+
+    started = time.monotonic()
+    monitor.close()
+    release.set()
+    assert time.monotonic() - started < 1.0
+    monitor.notifier._thread.join(5)
@@ -0,0 +1,117 @@
+import glob
+import os
+import re
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+from hotwheels_monitor import FirstCryScraper  # noqa: E402
+
+FIXTURES = sorted(glob.glob(os.path.join(HERE, "..", "benchmarks", "fixtures", "*.html")))
+URL = "https://www.firstcry.com/hot-wheels/car/12345/product-detail"
+
+
+def product_page(buttons, extra=""):
+    return (
+        '<html><body><h1 class="prod-name">Hot Wheels Car</h1>'
+        f'<span class="prod-price">₹199</span>{extra}{buttons}</body></html>'
+    ).encode()
+
+
+EDGE_PAGES = {
+    "plain": product_page("<button>Add to Cart</button>"),
+    "icon": product_page('<button><i class="ic"></i>Add to Cart</button>'),
+    "wrapped": product_page("<button><span>Add to Cart</span></button>"),
+    "line break": product_page("<button>Add to<br>Cart</button>"),
+    "comment in button": product_page("<button><!-- add to cart -->Buy</button>"),
+    "comment": product_page("<button>Add to Cart</button>", "<!-- notify me -->"),
+    "split badge": product_page("<button>Add to Cart</button>", "<div><span>Out of</span> <span>Stock</span></div>"),
+    "notify me": product_page('<button><i class="bell"></i>Notify Me</button>'),
+    "no button": product_page(""),
+}
+
+LISTING_EDGES = {
+    "split badge": '<span>Out of</span><span>Stock</span>',
+    "split cart": '<span>Add to</span><span>Cart</span>',
+    "nested badge": '<div><b>Notify</b><b>Me</b></div>',
+    "script": '<script>var label = "notify me";</script><span>Add to Cart</span>',
+    "comment": '<!-- out of stock --><span>Add to Cart</span>',
+    "no badge": '',
+}
+
+
+def listing_page(badge):
+    return (
+        '<html><body><div class="list"><div class="tile">'
+        '<a href="/hot-wheels/car/12345/product-detail" title="Hot Wheels Car">Hot Wheels Car</a>'
+        f'<div class="rupee">₹199</div>{badge}</div></div></body></html>'
+    ).encode()
+
+
+@pytest.fixture(scope="module")
+def scrapers():
+    built = {
+        "lxml": FirstCryScraper(parser="lxml"),
+        "html.parser": FirstCryScraper(parser="html.parser"),
+        "unrestricted": FirstCryScraper(parser="html.parser", restrict_parse=False),
+    }
+    if built["lxml"].parser != "lxml":
+        pytest.skip("lxml is not installed")
+    yield built
+    for scraper in built.values():
+        scraper.close()
+
+
+def parse_all(scrapers, parse):
+    return {name: parse(scraper) for name, scraper in scrapers.items()}
+
+
+def assert_same(results):
+    first = next(iter(results.values()))
+    assert all(result == first for result in results.values()), results
+
+
+def test_fixtures_exist():
+    assert any("listing" in path for path in FIXTURES)
+    assert any("product-" in path for path in FIXTURES)
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=os.path.basename)
+def test_fixture_pages_parse_the_same(scrapers, path):
+    with open(path, "rb") as f:
+        content = f.read()
+    m = re.search(r"product-(\d+)", os.path.basename(path))
+    if m:
+        url = f"{FirstCryScraper.BASE_URL}/hot-wheels/x/{m.group(1)}/product-detail"
+        assert_same(parse_all(scrapers, lambda s: s._parse_product(url, content)))
+    else:
+        assert_same(parse_all(scrapers, lambda s: s._parse_listing(content)))
+
+
+@pytest.mark.parametrize("name", EDGE_PAGES)
+def test_product_edge_pages_classify_the_same(scrapers, name):
+    results = parse_all(scrapers, lambda s: s._parse_product(URL, EDGE_PAGES[name]))
+    assert_same(results)
+
+
+def test_button_text_ignores_markup_inside_the_button(scrapers):
+    for name in ("icon", "wrapped", "line break"):
+        data = scrapers["lxml"]._parse_product(URL, EDGE_PAGES[name])
+        assert (data["is_buyable"], data["buy_confidence"]) == (True, 1.0), name
+    data = scrapers["lxml"]._parse_product(URL, EDGE_PAGES["comment in button"])
+    assert data["is_buyable"] is False
+
+
+@pytest.mark.parametrize("name", LISTING_EDGES)
+def test_listing_edge_tiles_read_the_same(scrapers, name):
+    content = listing_page(LISTING_EDGES[name])
+    assert_same(parse_all(scrapers, lambda s: s._parse_listing(content)))
+
+
+def test_split_listing_badge_is_read(scrapers):
+    for scraper in scrapers.values():
+        (tile,) = scraper._parse_listing(listing_page(LISTING_EDGES["split badge"])).values()
+        assert tile.stock is False
@@ -0,0 +1,129 @@
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import hotwheels_monitor  # noqa: E402
+from hotwheels_monitor import RateLimiter, ScanBudget, ScanBudgetExhausted  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(hotwheels_monitor.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(hotwheels_monitor.time, "sleep", clock.sleep)
+    return clock
+
+
+def test_burst_then_steady_rate(clock):
+    limiter = RateLimiter(2.0, burst=3)
+    assert [limiter.reserve() for _ in range(5)] == [0.0, 0.0, 0.0, 0.5, 1.0]
+    clock.now += 1.0                      # two tokens accrue, paying back the debt
+    assert limiter.reserve() == 0.5
+
+
+def test_idle_time_refills_only_up_to_burst(clock):
+    limiter = RateLimiter(2.0, burst=3)
+    for _ in range(3):
+        limiter.reserve()
+    clock.now += 60.0
+    assert [limiter.reserve() for _ in range(4)] == [0.0, 0.0, 0.0, 0.5]
+
+
+def test_no_rate_means_no_wait(clock):
+    limiter = RateLimiter(0)
+    assert all(limiter.reserve() == 0.0 for _ in range(100))
+
+
+def test_retry_after_pauses_everyone_and_accrues_nothing(clock):
+    limiter = RateLimiter(2.0, burst=3)
+    limiter.throttled(retry_after=10)
+    assert limiter.rate == 1.0
+    # The bucket is emptied and stays empty through the pause, so even the
+    # first request after it waits for a fresh token at the halved rate.
+    assert limiter.reserve() == 11.0
+    assert limiter.paused_for() == 10.0
+    clock.now += 10.0
+    assert limiter.paused_for() == 0.0
+    assert limiter.reserve() == 2.0
+    clock.now += 3.0
+    assert limiter.reserve() == 0.0
+
+
+def test_longer_retry_after_wins(clock):
+    limiter = RateLimiter(2.0)
+    limiter.throttled(retry_after=30)
+    limiter.throttled(retry_after=5)
+    assert limiter.paused_for() == 30.0
+
+
+def test_acquire_sleeps_out_the_pause(clock):
+    limiter = RateLimiter(0)
+    limiter.throttled(retry_after=7)
+    limiter.acquire()
+    assert clock.slept == [7.0]
+
+
+def test_acquire_refuses_a_wait_past_the_deadline(clock):
+    limiter = RateLimiter(2.0)
+    budget = ScanBudget(deadline=5)
+    limiter.throttled(retry_after=40)
+    with pytest.raises(ScanBudgetExhausted):
+        limiter.acquire(budget)
+    assert clock.slept == []
+    assert budget.exhausted()
+
+
+def test_aimd_floor_and_ceiling(clock):
+    limiter = RateLimiter(2.0)
+    for _ in range(10):
+        limiter.throttled()
+    assert limiter.rate == 2.0 / 16
+    limiter.succeeded()
+    assert limiter.rate == pytest.approx(2.0 / 16 + 2.0 / RateLimiter.INCREASE_STEPS)
+    for _ in range(2 * RateLimiter.INCREASE_STEPS):
+        limiter.succeeded()
+    assert limiter.rate == 2.0
+
+
+def test_explicit_min_rate(clock):
+    limiter = RateLimiter(2.0, min_rate=0.5)
+    for _ in range(5):
+        limiter.throttled()
+    assert limiter.rate == 0.5
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("120", 120.0),
+    (" 7 ", 7.0),
+    ("", None),
+    (None, None),
+    ("soon", None),
+    ("-5", None),
+])
+def test_parse_retry_after_seconds(value, expected):
+    assert RateLimiter.parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 28 <= RateLimiter.parse_retry_after(format_datetime(when, usegmt=True)) <= 30
+    past = datetime.now(timezone.utc) - timedelta(minutes=5)
+    assert RateLimiter.parse_retry_after(format_datetime(past, usegmt=True)) == 0.0
@@ -0,0 +1,175 @@
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hotwheels_monitor import DetailPriority, HotWheelsMonitor, MonitorConfig, ProductState  # noqa: E402
+
+
+class FakeSite:
+    """Serves one listing page and the product pages it links to."""
+
+    def __init__(self):
+        self.products = {}       # product_id -> (in_stock, price)
+        self.detail_fetches = []
+        self._lock = threading.Lock()
+
+    def listing(self):
+        tiles = "".join(
+            f'<div class="tile"><a href="/hot-wheels/car-{pid}/{pid}/product-detail" '
+            f'title="Hot Wheels Car {pid}">Hot Wheels Car {pid}</a><span>₹{price}</span>'
+            f'<span>{"Add to Cart" if in_stock else "Out of Stock"}</span></div>'
+            for pid, (in_stock, price) in sorted(self.products.items())
+        )
+        return f"<html><body>{tiles}</body></html>".encode()
+
+    def product(self, pid):
+        in_stock, price = self.products[pid]
+        action = "<button>Add to Cart</button>" if in_stock else "<div>Out of Stock</div>"
+        return (f'<html><body><h1 class="prod-name">Hot Wheels Car {pid}</h1>'
+                f'<span class="prod-price">₹{price}</span>{action}</body></html>').encode()
+
+    def send(self, url, headers=None):
+        m = re.search(r"/(\d+)/product-detail", url)
+        if m:
+            with self._lock:
+                self.detail_fetches.append(m.group(1))
+            content = self.product(m.group(1))
+        else:
+            content = self.listing()
+        return SimpleNamespace(status_code=200, content=content, headers={})
+
+
+class FakeNotifier:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, notification):
+        self.sent.append((notification.product_id, notification.kind))
+        delivery = Future()
+        delivery.set_result(True)
+        return delivery
+
+    def close(self, timeout=None):
+        pass
+
+
+class Killed(Exception):
+    """Stands in for the process dying mid-scan."""
+
+
+def make_monitor(site, db_path, **config):
+    config.setdefault("workers", 1)
+    monitor = HotWheelsMonitor("token", "chat", MonitorConfig(db_path=db_path, rate=0, **config))
+    monitor.notifier.close()
+    monitor.notifier = FakeNotifier()
+    monitor.scraper._send = site.send
+    # One surface, so the request budget spent on listing pages is exact.
+    monitor.scraper.DISCOVERY_SURFACES = {"brand": "/hot-wheels/0/0/113"}
+    return monitor
+
+
+def scan_queue(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT product_id, priority FROM scan_queue ORDER BY priority, position").fetchall()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def site():
+    return FakeSite()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "t.db")
+
+
+def seed(site, db_path):
+    """Four known out-of-stock products, then a listing that restocks two
+    of them, changes the price of a third and adds two new products."""
+    site.products = {pid: (False, 199) for pid in ("1", "2", "3", "4")}
+    with make_monitor(site, db_path) as monitor:
+        monitor.run_scan()
+    site.products.update({"1": (True, 199), "2": (True, 199), "3": (False, 149),
+                          "5": (True, 299), "6": (True, 299)})
+    site.detail_fetches.clear()
+
+
+def test_budget_carry_over_is_fetched_first_by_the_next_scan(site, db_path):
+    seed(site, db_path)
+    with make_monitor(site, db_path, max_requests=1) as monitor:
+        monitor.run_scan()
+    assert site.detail_fetches == []
+    assert scan_queue(db_path) == [
+        ("5", DetailPriority.NEW), ("6", DetailPriority.NEW),
+        ("1", DetailPriority.RESTOCK), ("2", DetailPriority.RESTOCK),
+        ("3", DetailPriority.CHANGED),
+    ]
+
+    with make_monitor(site, db_path) as monitor:
+        monitor.run_scan()
+        index = monitor.db.load_index()
+        sent = monitor.notifier.sent
+    assert site.detail_fetches[:4] == ["5", "6", "1", "2"]
+    assert sorted(site.detail_fetches) == ["1", "2", "3", "5", "6"]
+    assert scan_queue(db_path) == []
+    assert index["1"].state == index["2"].state == ProductState.BUYABLE
+    assert index["3"].price == 149.0
+    assert sorted(sent) == [("1", "RESTOCK"), ("2", "RESTOCK"), ("5", "NEW"), ("6", "NEW")]
+
+
+def test_killed_scan_resumes_from_its_last_checkpoint(site, db_path, monkeypatch):
+    seed(site, db_path)
+    monkeypatch.setattr(HotWheelsMonitor, "CHECKPOINT_INTERVAL", 0.0)
+    with make_monitor(site, db_path) as monitor:
+        commit_batch = monitor.db.commit_batch
+        commits = []
+
+        def dies_on_third_checkpoint(batch):
+            commits.append(batch.state.copy())
+            if sum("checkpoint_at" in state for state in commits) == 3:
+                raise Killed
+            commit_batch(batch)
+
+        monitor.db.commit_batch = dies_on_third_checkpoint
+        with pytest.raises(Killed):
+            monitor.run_scan()
+
+    queued = scan_queue(db_path)
+    fetched_before = list(site.detail_fetches)
+    assert queued, "the last checkpoint should have queued the unfinished fetches"
+    assert [priority for _, priority in queued] == sorted(priority for _, priority in queued)
+    site.detail_fetches.clear()
+
+    with make_monitor(site, db_path) as monitor:
+        monitor.run_scan()
+        index = monitor.db.load_index()
+        state = monitor.db.load_scan_state()
+    resumed_first = [pid for pid, priority in queued if priority <= DetailPriority.RESTOCK]
+    assert site.detail_fetches[:len(resumed_first)] == resumed_first
+    assert scan_queue(db_path) == []
+    assert state["scan_finished"] >= state["scan_started"]
+    for pid in ("1", "2", "5", "6"):
+        assert index[pid].state == ProductState.BUYABLE, pid
+    assert set(fetched_before) | set(site.detail_fetches) >= {"1", "2", "3", "5", "6"}
+
+
+def test_summary_counts_saves_and_sightings_separately(site, db_path, caplog):
+    seed(site, db_path)
+    site.products = {pid: (False, 199) for pid in ("1", "2", "3", "4")}
+    site.products["2"] = (False, 149)
+    with make_monitor(site, db_path) as monitor:
+        with caplog.at_level(logging.INFO):
+            monitor.run_scan()
+    assert "Products saved: 1. Unchanged products seen: 3." in caplog.text
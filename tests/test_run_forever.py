@@ -0,0 +1,69 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import hotwheels_monitor  # noqa: E402
+from hotwheels_monitor import HotWheelsMonitor, MonitorConfig  # noqa: E402
+
+
+class FakeClock:
+    """Stands in for ``time.monotonic`` and the monitor's stop event."""
+
+    def __init__(self, ticks):
+        self.now = 1000.0
+        self.ticks = ticks
+
+    def monotonic(self):
+        return self.now
+
+    def is_set(self):
+        return self.ticks <= 0
+
+    def wait(self, seconds):
+        self.now += seconds
+
+
+def run_ticks(monkeypatch, tmp_path, ticks, scan_seconds=5.0, **config):
+    clock = FakeClock(ticks)
+    monkeypatch.setattr(hotwheels_monitor.time, "monotonic", clock.monotonic)
+    monitor = HotWheelsMonitor("token", "chat", MonitorConfig(db_path=str(tmp_path / "t.db"), **config))
+    scans = []
+
+    def run_scan(revalidate=True):
+        scans.append((clock.now, revalidate))
+        clock.now += scan_seconds
+        clock.ticks -= 1
+
+    monitor.run_scan = run_scan
+    monitor._stopping = clock
+    try:
+        monitor.run_forever()
+    finally:
+        monitor.close()
+    return scans
+
+
+def test_default_cadence_revalidates_every_tick_despite_jitter(monkeypatch, tmp_path):
+    random.seed(3)
+    scans = run_ticks(monkeypatch, tmp_path, 40)
+    assert len(scans) == 40
+    assert all(revalidate for _, revalidate in scans)
+    gaps = [b - a for (a, _), (b, _) in zip(scans, scans[1:])]
+    assert any(gap < 120 for gap in gaps)    # jitter did pull some scans early
+
+
+def test_slower_revalidation_follows_the_tick_schedule(monkeypatch, tmp_path):
+    random.seed(3)
+    scans = run_ticks(monkeypatch, tmp_path, 40, revalidate_interval=600)
+    assert [revalidate for _, revalidate in scans] == [n % 5 == 0 for n in range(40)]
+
+
+def test_overrunning_scans_skip_ticks_but_still_revalidate_on_time(monkeypatch, tmp_path):
+    random.seed(3)
+    scans = run_ticks(monkeypatch, tmp_path, 10, scan_seconds=250, revalidate_interval=360, jitter=0)
+    # Each scan overruns into the next two ticks, so scans start every 360s
+    # of schedule and every one of them is due for revalidation.
+    assert [round(b - a) for (a, _), (b, _) in zip(scans, scans[1:])] == [360] * 9
+    assert all(revalidate for _, revalidate in scans)
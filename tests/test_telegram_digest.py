@@ -0,0 +1,69 @@
+import os
+import sys
+from concurrent.futures import Future
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hotwheels_monitor import Alert, Notification, TelegramNotifier  # noqa: E402
+
+MARKDOWN_NAME = "Hot_Wheels *Super* [Treasure] `Hunt`"
+ESCAPED_NAME = r"Hot\_Wheels \*Super\* \[Treasure] \`Hunt\`"
+
+
+def alert(n, name, kind="NEW"):
+    return Alert(Notification(
+        key=f"{n}:{kind}:2024-05-01T10:00:00", product_id=str(n), kind=kind, name=name,
+        url=f"https://www.firstcry.com/hot-wheels/car-{n}/{n}/product-detail",
+        price=199.0 + n, created_at="2024-05-01T10:00:00"
+    ), Future())
+
+
+@pytest.fixture
+def notifier():
+    notifier = TelegramNotifier("token", "chat")
+    yield notifier
+    notifier.close()
+
+
+def test_large_burst_fits_telegram_limits(notifier):
+    alerts = [
+        alert(n, f"Hot Wheels {'🏎️🔥' * (n % 40)} Car Culture {MARKDOWN_NAME} #{n} " + "x" * (n % 7) * 20,
+              kind="RESTOCK" if n % 3 else "NEW")
+        for n in range(150)
+    ]
+    messages = notifier.format_digest(alerts)
+    assert len(messages) > 1
+    for text, carried in messages:
+        assert notifier._length(text) <= TelegramNotifier.MAX_MESSAGE
+        assert carried
+    # Every alert is carried exactly once, in order.
+    assert [a for _, carried in messages for a in carried] == alerts
+    for text, carried in messages:
+        for a in carried:
+            assert a.notification.url in text
+        assert MARKDOWN_NAME not in text
+        assert ESCAPED_NAME in text
+
+
+def test_emoji_count_as_two_utf16_units(notifier):
+    assert notifier._length("🏎") == 2
+    assert notifier._length("₹") == 1
+
+
+def test_lone_alert_in_a_chunk_uses_the_single_alert_format(notifier):
+    # Names this long leave room for only one alert per message.
+    alerts = [alert(n, f"Hot Wheels {'🚗' * 1000} {n}") for n in range(3)]
+    messages = notifier.format_digest(alerts)
+    assert [carried for _, carried in messages] == [[a] for a in alerts]
+    for (text, _), a in zip(messages, alerts):
+        assert text == notifier.format(a)
+        assert notifier._length(text) <= TelegramNotifier.MAX_MESSAGE
+
+
+def test_single_alert_is_escaped(notifier):
+    (text, carried), = notifier.format_digest([alert(1, MARKDOWN_NAME, kind="RESTOCK")])
+    assert text.startswith("🔄 *RESTOCK HOT WHEELS ALERT*")
+    assert ESCAPED_NAME in text
+    assert len(carried) == 1